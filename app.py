@@ -1,858 +1,4041 @@
 # Importing required Libraries
-from flask import Flask, request, jsonify
+from flask import Flask, request, g
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import BadRequest
 import json
 import time
 import string
 import random
 import hashlib
+import hmac
+import base64
+import secrets
+import math
+import threading
+import tempfile
+import atexit
+import os
+import codecs
+import zlib
+import re
+from collections import OrderedDict
+
+# Use orjson for serialization when it is installed, otherwise fall back to the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+
+
+
+# Create a Flask application
+app = Flask(__name__)
+
+# Set the path to your favicon file
+app.config['FAVICON'] = 'logo.ico'
+
+# Set the name of your API
+app.name = 'OpenSource DB'
+
+# Keep stored values as encoded JSON bytes instead of Python objects to save memory
+app.config['COMPACT_VALUES'] = os.environ.get('OPENSOURCE_DB_COMPACT_VALUES', '0') == '1'
+
+# In compact mode, compress encoded values larger than this many bytes
+app.config['COMPACT_COMPRESS_THRESHOLD'] = int(os.environ.get('OPENSOURCE_DB_COMPRESS_THRESHOLD', 1024))
+
+# In compact mode, number of recently decoded values kept in memory
+app.config['DECODED_CACHE_SIZE'] = int(os.environ.get('OPENSOURCE_DB_DECODED_CACHE_SIZE', 1024))
+
+# Secret used to sign session tokens; a random one makes tokens invalid after a restart
+app.config['TOKEN_SECRET'] = os.environ.get('OPENSOURCE_DB_TOKEN_SECRET', '').encode() or secrets.token_bytes(32)
+
+# Default and maximum lifetime of session tokens, in seconds
+app.config['TOKEN_TTL'] = int(os.environ.get('OPENSOURCE_DB_TOKEN_TTL', 900))
+app.config['MAX_TOKEN_TTL'] = 86400
+
+# Requests per second and burst size allowed per database and per passcode or token; 0 disables the limit
+app.config['DATABASE_RATE_LIMIT'] = float(os.environ.get('OPENSOURCE_DB_DATABASE_RATE_LIMIT', 0))
+app.config['DATABASE_RATE_BURST'] = float(os.environ.get('OPENSOURCE_DB_DATABASE_RATE_BURST', 100))
+app.config['CLIENT_RATE_LIMIT'] = float(os.environ.get('OPENSOURCE_DB_CLIENT_RATE_LIMIT', 0))
+app.config['CLIENT_RATE_BURST'] = float(os.environ.get('OPENSOURCE_DB_CLIENT_RATE_BURST', 50))
+
+# Number of expensive requests (whole database reads, queries, imports and backups) handled at once; 0 disables the limit
+app.config['EXPENSIVE_CONCURRENCY'] = int(os.environ.get('OPENSOURCE_DB_EXPENSIVE_CONCURRENCY', 8))
+
+# Directory holding the snapshot and log segments
+app.config['STORAGE_DIR'] = os.environ.get('OPENSOURCE_DB_STORAGE_DIR', 'storage')
+
+# Size in bytes at which a log segment is sealed and a new one started
+app.config['SEGMENT_BYTES'] = int(os.environ.get('OPENSOURCE_DB_SEGMENT_BYTES', 4 * 1024 * 1024))
+
+# Flush every write to the disk itself before considering it saved
+app.config['FSYNC'] = os.environ.get('OPENSOURCE_DB_FSYNC', '1') == '1'
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Health check fails if a snapshot has been waiting longer than this many seconds
+MAX_PENDING_SAVE_AGE = 60
+
+# Seconds to wait before repairing the log again after a failed repair
+LOG_REPAIR_RETRY_SECONDS = 5
+
+# Number of records applied at once by a bulk import, by default and at most
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_BATCH_SIZE = 10000
+
+# Bytes read from an upload at a time, and the largest single record accepted
+IMPORT_CHUNK_SIZE = 64 * 1024
+MAX_IMPORT_RECORD_BYTES = 16 * 1024 * 1024
+
+# Number of snapshot segments kept, so recovery can fall back to an older one if the newest is damaged
+KEEP_SNAPSHOTS = 2
+
+# Keys put, deleted or versioned by a single storage record, so a large change is written as several bounded lines
+MAX_RECORD_KEYS = 1000
+
+# Columns the catalog can be sorted by
+CATALOG_SORT_KEYS = ('name', 'key_count', 'total_value_bytes', 'average_value_bytes', 'last_modified', 'writes', 'reads')
+
+# Type and description of every metric exposed on /metrics
+METRICS = {
+    'opensource_db_requests_total': ('counter', 'Number of requests handled, by route, method and status.'),
+    'opensource_db_request_duration_seconds': ('histogram', 'Request latency, by route and method.'),
+    'opensource_db_save_snapshot_seconds': ('histogram', 'Time saveData() spends collecting changes in the request thread.'),
+    'opensource_db_save_write_seconds': ('histogram', 'Time the background writer spends writing a snapshot to disk.'),
+    'opensource_db_save_bytes_total': ('counter', 'Bytes written to disk by the background writer.'),
+    'opensource_db_save_failures_total': ('counter', 'Number of snapshots that failed to be written.'),
+    'opensource_db_compaction_seconds': ('histogram', 'Time the compactor spends writing a snapshot segment.'),
+    'opensource_db_compactions_total': ('counter', 'Number of compactions, by outcome.'),
+    'opensource_db_storage_bytes': ('gauge', 'Bytes used by the snapshot and log segments, by kind.'),
+    'opensource_db_recovery_seconds': ('gauge', 'Time spent recovering the data at startup.'),
+    'opensource_db_recovered_records': ('gauge', 'Log records replayed on top of the snapshot at startup.'),
+    'opensource_db_lock_acquisitions_total': ('counter', 'Number of times the data lock was acquired.'),
+    'opensource_db_lock_wait_seconds_total': ('counter', 'Total time spent waiting for the data lock.'),
+    'opensource_db_cache_hits_total': ('counter', 'Cache hits, by cache.'),
+    'opensource_db_cache_misses_total': ('counter', 'Cache misses, by cache.'),
+    'opensource_db_import_records_total': ('counter', 'Records received by bulk imports, by outcome.'),
+    'opensource_db_auth_total': ('counter', 'Authentication attempts, by method and outcome.'),
+    'opensource_db_admission_total': ('counter', 'Admission control decisions, by decision and reason.'),
+    'opensource_db_last_save_timestamp_seconds': ('gauge', 'Unix time of the last successful write to disk.'),
+    'opensource_db_last_save_bytes': ('gauge', 'Bytes written by the last successful write to disk.'),
+    'opensource_db_databases': ('gauge', 'Number of databases.'),
+    'opensource_db_keys': ('gauge', 'Number of keys, by database.'),
+    'opensource_db_value_bytes': ('gauge', 'Encoded size of the stored values, by database.')
+}
+
+# Counters and histograms, keyed by metric name and a tuple of label pairs
+metric_counters = {}
+metric_histograms = {}
+metric_gauges = {}
+metrics_lock = threading.Lock()
+
+
+
+
+
+def incrementMetric(name, amount=1, **labels):
+  """
+  Increment a counter metric.
+
+  Parameters:
+      name (str): The name of the metric.
+      amount (float): The amount to add.
+      labels: The labels of the sample.
+
+  Returns:
+      None
+  """
+  key = (name, tuple(sorted(labels.items())))
+  with metrics_lock:
+    metric_counters[key] = metric_counters.get(key, 0) + amount
+
+
+
+
+
+def observeMetric(name, value, **labels):
+  """
+  Record an observation in a histogram metric.
+
+  Parameters:
+      name (str): The name of the metric.
+      value (float): The observed value, in seconds.
+      labels: The labels of the sample.
+
+  Returns:
+      None
+  """
+  key = (name, tuple(sorted(labels.items())))
+  with metrics_lock:
+    histogram = metric_histograms.get(key)
+    if histogram is None:
+      histogram = metric_histograms[key] = {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0}
+    for index, bound in enumerate(LATENCY_BUCKETS):
+      if value <= bound:
+        histogram['buckets'][index] += 1
+    histogram['sum'] += value
+    histogram['count'] += 1
+
+
+
+
+
+def setMetric(name, value, **labels):
+  """
+  Set a gauge metric.
+
+  Parameters:
+      name (str): The name of the metric.
+      value (float): The new value.
+      labels: The labels of the sample.
+
+  Returns:
+      None
+  """
+  with metrics_lock:
+    metric_gauges[(name, tuple(sorted(labels.items())))] = value
+
+
+
+
+
+class TimedLock:
+  """
+  A re-entrant lock that records how long callers wait to acquire it.
+  """
+
+  def __init__(self):
+    self._lock = threading.RLock()
+
+  def __enter__(self):
+    started = time.perf_counter()
+    self._lock.acquire()
+    incrementMetric('opensource_db_lock_acquisitions_total')
+    incrementMetric('opensource_db_lock_wait_seconds_total', time.perf_counter() - started)
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self._lock.release()
+
+
+
+
+
+def rejectConstant(name):
+  """
+  Refuse NaN, Infinity and -Infinity while parsing JSON.
+
+  orjson writes these as null, so a value holding them would not be stored as it
+  was sent.
+
+  Parameters:
+      name (str): The constant that was found.
+
+  Raises:
+      ValueError: Always.
+  """
+  raise ValueError(name + ' is not a valid JSON value.')
+
+
+
+
+
+class StrictJSONProvider(DefaultJSONProvider):
+  """
+  JSON provider of the application, refusing NaN and Infinity in request bodies.
+  """
+
+  def loads(self, s, **kwargs):
+    kwargs.setdefault('parse_constant', rejectConstant)
+    return super().loads(s, **kwargs)
+
+
+app.json = StrictJSONProvider(app)
+
+
+
+
+
+def encodeJSON(value):
+  """
+  Serialize a value to compact JSON bytes.
+
+  Uses orjson when it is installed and the stdlib json module otherwise, or when
+  orjson cannot represent the value (for example integers above 64 bits).
+
+  Parameters:
+      value: The value to serialize.
+
+  Returns:
+      bytes: The UTF-8 encoded JSON.
+  """
+  if orjson is not None:
+    try:
+      return orjson.dumps(value)
+    except TypeError:
+      pass
+  return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+
+
+
+# A run of digits that may not fit a 64-bit integer, which orjson would parse as a float.
+# Integers below -2**63 already have 19 digits.
+LONG_DIGITS = re.compile(r'\d{19}')
+LONG_DIGITS_BYTES = re.compile(rb'\d{19}')
+
+
+
+
+
+def decodeJSON(raw):
+  """
+  Parse JSON text or bytes, using orjson when it is installed.
+
+  Like encodeJSON(), the stdlib json module is used when the JSON may hold an
+  integer orjson cannot represent, so such integers are not turned into floats.
+
+  Parameters:
+      raw (bytes or str): The JSON to parse.
+
+  Returns:
+      The parsed value.
+
+  Raises:
+      ValueError: If the JSON is invalid.
+  """
+  if orjson is not None:
+    long_digits = LONG_DIGITS if isinstance(raw, str) else LONG_DIGITS_BYTES
+    if long_digits.search(raw) is None:
+      return orjson.loads(raw)
+  return json.loads(raw)
+
+
+
+
+
+def jsonResponse(value):
+  """
+  Build a JSON response from a value or from already encoded JSON bytes.
+
+  Parameters:
+      value: The value to send, or bytes that are already JSON.
+
+  Returns:
+      The Flask response object.
+  """
+  body = value if isinstance(value, bytes) else encodeJSON(value)
+  return app.response_class(body, mimetype='application/json')
+
+
+
+
+
+def encodeDatabase(name, entries, cache=None):
+  """
+  Serialize a whole database as a JSON object.
+
+  With orjson a single call over the whole dictionary is the fastest option. With
+  the json module, the encoded bytes of every entry are cached and spliced
+  together, so only values that changed since the last call are encoded again.
+  Handlers always replace stored values instead of mutating them, so an unchanged
+  value is still the very same object as the one that was encoded. Compact values
+  are spliced in as they are stored, without decoding them.
+
+  Parameters:
+      name (str): The name of the database.
+      entries (dict): The keys and values of the database.
+      cache (dict): The cache to store the encoded entries in, defaults to encoded_values.
+
+  Returns:
+      bytes: The database as a JSON object.
+  """
+  if orjson is not None and not app.config['COMPACT_VALUES']:
+    try:
+      return encodeJSON(entries)
+    except TypeError:
+      pass
+
+  previous = encoded_values.get(name, {})
+  current = {}
+  parts = []
+  hits = 0
+  for key, value in entries.items():
+    if isinstance(value, CompactValue):
+      parts.append(encodeJSON(key) + b':' + value.raw())
+      continue
+    cached = previous.get(key)
+    if cached is not None and cached[0] is value:
+      hits += 1
+    else:
+      cached = (value, encodeJSON(key) + b':' + encodeJSON(value))
+    current[key] = cached
+    parts.append(cached[1])
+
+  if cache is None:
+    encoded_values.setdefault(name, {}).update(current)
+  else:
+    cache[name] = current
+  incrementMetric('opensource_db_cache_hits_total', hits, cache='encoded_values')
+  incrementMetric('opensource_db_cache_misses_total', len(current) - hits, cache='encoded_values')
+  return b'{' + b','.join(parts) + b'}'
+
+
+
+
+
+class CompactValue:
+  """
+  A stored value kept as its encoded JSON, compressed when that makes it smaller.
+  """
+
+  __slots__ = ('encoded', 'compressed', 'size')
+
+  def __init__(self, value):
+    encoded = encodeJSON(value)
+    self.size = len(encoded)
+    self.compressed = False
+    if len(encoded) > app.config['COMPACT_COMPRESS_THRESHOLD']:
+      compressed = zlib.compress(encoded, 1)
+      if len(compressed) < len(encoded):
+        encoded = compressed
+        self.compressed = True
+    self.encoded = encoded
+
+  def raw(self):
+    """
+    Get the encoded JSON of the value.
+
+    Returns:
+        bytes: The encoded JSON.
+    """
+    return zlib.decompress(self.encoded) if self.compressed else self.encoded
+
+
+
+
+
+# Recently decoded compact values, keyed by database and key, with the compact value they came from
+decoded_values = OrderedDict()
+decoded_values_lock = threading.Lock()
+
+
+
+
+
+def storeValue(value):
+  """
+  Convert a value into the form it is stored in.
+
+  Parameters:
+      value: The value sent by the client.
+
+  Returns:
+      A CompactValue in compact mode, otherwise the value itself.
+  """
+  if app.config['COMPACT_VALUES'] and not isinstance(value, CompactValue):
+    return CompactValue(value)
+  return value
+
+
+
+
+
+def loadValue(name, key, stored):
+  """
+  Get the Python object of a stored value, decoding compact values only when needed.
+
+  Recently decoded values are kept in a small least-recently-used cache.
+
+  Parameters:
+      name (str): The name of the database.
+      key (str): The key of the value.
+      stored: The stored value.
+
+  Returns:
+      The decoded value.
+  """
+  if not isinstance(stored, CompactValue):
+    return stored
+
+  with decoded_values_lock:
+    cached = decoded_values.get((name, key))
+    if cached is not None and cached[0] is stored:
+      decoded_values.move_to_end((name, key))
+      hit = True
+    else:
+      hit = False
+  incrementMetric('opensource_db_cache_hits_total' if hit else 'opensource_db_cache_misses_total', cache='decoded_values')
+  if hit:
+    return cached[1]
+
+  value = decodeJSON(stored.raw())
+  with decoded_values_lock:
+    decoded_values[(name, key)] = (stored, value)
+    decoded_values.move_to_end((name, key))
+    while len(decoded_values) > app.config['DECODED_CACHE_SIZE']:
+      decoded_values.popitem(last=False)
+  return value
+
+
+
+
+
+def responseValue(stored):
+  """
+  Get what to send in a response for a stored value, without decoding compact values.
+
+  Parameters:
+      stored: The stored value.
+
+  Returns:
+      The encoded JSON bytes of a compact value, otherwise the value itself.
+  """
+  if isinstance(stored, CompactValue):
+    return stored.raw()
+  return stored
+
+
+
+
+
+# Statistics of every database, kept up to date by the handlers that read and modify it
+database_stats = {}
+stats_lock = threading.Lock()
+
+# Encoded size of every plain stored value, recorded when the value is written
+value_sizes = {}
+
+# Marker for a key that had no value before a write
+NO_VALUE = object()
+
+
+
+
+
+def valueSize(stored):
+  """
+  Get the size of the encoded JSON of a stored value.
+
+  Parameters:
+      stored: The stored value, or NO_VALUE.
+
+  Returns:
+      int: The size in bytes, 0 for NO_VALUE.
+  """
+  if stored is NO_VALUE:
+    return 0
+  if isinstance(stored, CompactValue):
+    return stored.size
+  return len(encodeJSON(stored))
+
+
+
+
+
+def adjustStats(name, keys=0, value_bytes=0, writes=0, reads=0):
+  """
+  Apply a change to the statistics of a database.
+
+  Parameters:
+      name (str): The name of the database.
+      keys (int): The change in the number of keys.
+      value_bytes (int): The change in the total encoded size of the values.
+      writes (int): The number of writes to add.
+      reads (int): The number of reads to add.
+
+  Returns:
+      None
+  """
+  with stats_lock:
+    stats = database_stats.get(name)
+    if stats is None:
+      stats = database_stats[name] = {'key_count': 0, 'total_value_bytes': 0, 'last_modified': None, 'writes': 0, 'reads': 0}
+    stats['key_count'] += keys
+    stats['total_value_bytes'] += value_bytes
+    stats['reads'] += reads
+    if writes:
+      stats['writes'] += writes
+      stats['last_modified'] = time.time()
+
+
+
+
+
+def storedSize(name, key, stored):
+  """
+  Get the recorded encoded size of a stored value without encoding it again. Must be called while holding data_lock.
+
+  Parameters:
+      name (str): The name of the database.
+      key (str): The key holding the value.
+      stored: The stored value, or NO_VALUE.
+
+  Returns:
+      int: The size in bytes, 0 for NO_VALUE.
+  """
+  if stored is NO_VALUE:
+    return 0
+  if isinstance(stored, CompactValue):
+    return stored.size
+  return value_sizes.get(name, {}).get(key, 0)
+
+
+
+
+
+def recordWrite(name, key, old, new, size):
+  """
+  Update the statistics of a database after a key was set. Must be called while holding data_lock.
+
+  Parameters:
+      name (str): The name of the database.
+      key (str): The key that was set.
+      old: The previous stored value, or NO_VALUE if the key is new.
+      new: The new stored value.
+      size (int): The size of the new value, from valueSize() before taking the lock.
+
+  Returns:
+      None
+  """
+  old_size = storedSize(name, key, old)
+  if not isinstance(new, CompactValue):
+    value_sizes.setdefault(name, {})[key] = size
+  adjustStats(name, keys=1 if old is NO_VALUE else 0, value_bytes=size - old_size, writes=1)
+
+
+
+
+
+def recordDelete(name, key, old):
+  """
+  Update the statistics of a database after a key was deleted. Must be called while holding data_lock.
+
+  Parameters:
+      name (str): The name of the database.
+      key (str): The key that was deleted.
+      old: The deleted stored value.
+
+  Returns:
+      None
+  """
+  old_size = storedSize(name, key, old)
+  value_sizes.get(name, {}).pop(key, None)
+  adjustStats(name, keys=-1, value_bytes=-old_size, writes=1)
+
+
+
+
+
+def rebuildStats(name):
+  """
+  Recount the keys and value sizes of a database, keeping its read and write counts.
+
+  Parameters:
+      name (str): The name of the database.
+
+  Returns:
+      None
+  """
+  with data_lock:
+    entries = dict(data.get(name, {}))
+  sizes = {key: valueSize(value) for key, value in entries.items() if not isinstance(value, CompactValue)}
+  total = sum(sizes.values()) + sum(value.size for value in entries.values() if isinstance(value, CompactValue))
+  with data_lock:
+    value_sizes[name] = sizes
+  with stats_lock:
+    stats = database_stats.setdefault(name, {'key_count': 0, 'total_value_bytes': 0, 'last_modified': None, 'writes': 0, 'reads': 0})
+    stats['key_count'] = len(entries)
+    stats['total_value_bytes'] = total
+
+
+
+
+
+def copyStats():
+  """
+  Copy the statistics of every database.
+
+  Parameters:
+      None
+
+  Returns:
+      dict: The statistics by database name.
+  """
+  with stats_lock:
+    return {name: dict(stats) for name, stats in database_stats.items()}
+
+
+
+
+
+def describeDatabase(name):
+  """
+  Summarize the statistics of a database.
+
+  Parameters:
+      name (str): The name of the database.
+
+  Returns:
+      dict: The name, creation time, key count, total and average value size, last modification time, writes and reads.
+  """
+  with stats_lock:
+    stats = dict(database_stats.get(name, {'key_count': 0, 'total_value_bytes': 0, 'last_modified': None, 'writes': 0, 'reads': 0}))
+  info = passcodes.get(name, {})
+  return {
+    'name': name,
+    'created_at': info.get('created_at'),
+    'key_count': stats['key_count'],
+    'total_value_bytes': stats['total_value_bytes'],
+    'average_value_bytes': stats['total_value_bytes'] / stats['key_count'] if stats['key_count'] else 0,
+    'last_modified': stats['last_modified'],
+    'writes': stats['writes'],
+    'reads': stats['reads']
+  }
+
+
+
+
+
+def databaseResponse(name, entries=None):
+  """
+  Build a JSON response containing a whole database without re-encoding unchanged values.
+
+  Parameters:
+      name (str): The name of the database.
+      entries (dict): The keys and values to send, defaults to the whole database.
+
+  Returns:
+      The Flask response object.
+  """
+  if entries is None:
+    with data_lock:
+      entries = dict(data[name])
+  return jsonResponse(encodeDatabase(name, entries))
+
+
+
+
+
+# Create a dictionary to store the data
+data = {}
+passcodes = {}
+
+# Create a dictionary to store the version of every key in every database
+versions = {}
+
+# Encoded JSON entries of every database, by key, with the value they were encoded from
+encoded_values = {}
+
+# Lock guarding every read-modify-write of data, versions and passcodes
+data_lock = TimedLock()
+
+# Keys changed since the last save by database, and databases created, deleted (True) or with a new passcode (False)
+dirty_keys = {}
+dirty_databases = {}
+
+# Changes waiting to be written by the background writer
+pending_changes = None
+pending_since = None
+snapshot_writing = False
+last_save_time = None
+last_save_error = None
+snapshot_condition = threading.Condition()
+
+# Open log segment the background writer appends to, and the state it has written
+log_file = None
+log_sequence = 0
+log_bytes = 0
+sealed_bytes = 0
+persisted_state = None
+
+# Set when an append failed part way, until the log is cut back and a snapshot holds the lost changes
+log_damaged = False
+repair_through = None
+
+# Latest sealed state waiting to be written as a snapshot segment by the compactor
+pending_compaction = None
+compacting = False
+last_snapshot_bytes = 0
+last_compaction_error = None
+compaction_condition = threading.Condition()
+
+
+
+
+
+def segmentPath(directory, kind, sequence):
+  """
+  Build the path of a snapshot or log segment.
+
+  Parameters:
+      directory (str): The storage directory.
+      kind (str): 'snapshot' or 'log'.
+      sequence (int): The sequence number of the segment.
+
+  Returns:
+      str: The path of the segment.
+  """
+  return os.path.join(directory, '{}-{:012d}.seg'.format(kind, sequence))
+
+
+
+
+
+def listSegments(directory):
+  """
+  Find the snapshot and log segments in a directory.
+
+  Parameters:
+      directory (str): The storage directory.
+
+  Returns:
+      tuple: Two dictionaries mapping sequence numbers to paths, for snapshots and for logs.
+  """
+  snapshots = {}
+  logs = {}
+  if not os.path.isdir(directory):
+    return snapshots, logs
+  for filename in os.listdir(directory):
+    kind, _, rest = filename.partition('-')
+    if not rest.endswith('.seg') or not rest[:-4].isdigit():
+      continue
+    if kind == 'snapshot':
+      snapshots[int(rest[:-4])] = os.path.join(directory, filename)
+    elif kind == 'log':
+      logs[int(rest[:-4])] = os.path.join(directory, filename)
+  return snapshots, logs
+
+
+
+
+
+def encodeRecord(op, **fields):
+  """
+  Encode a storage record as a checksummed line.
+
+  Every line is the CRC-32 of the record in hexadecimal, a space and the record as
+  compact JSON, so a torn or corrupted write is detected when the line is read back.
+
+  Parameters:
+      op (str): The kind of record.
+      **fields (bytes): The other fields of the record, already encoded as JSON.
+
+  Returns:
+      bytes: The record line.
+  """
+  parts = [b'"op":' + encodeJSON(op)] + [encodeJSON(key) + b':' + value for key, value in fields.items()]
+  payload = b'{' + b','.join(parts) + b'}'
+  return b'%08x ' % zlib.crc32(payload) + payload + b'\n'
+
+
+
+
+
+def readSegment(path):
+  """
+  Read the records of a segment, stopping at the first torn or corrupted line.
+
+  Records marked "more" are followed by the rest of the same change, so a group
+  whose last record is missing counts as torn as well.
+
+  Parameters:
+      path (str): The path of the segment.
+
+  Returns:
+      tuple: The valid records in order, and the size in bytes of the valid part of the segment.
+  """
+  with open(path, 'rb') as infile:
+    content = infile.read()
+  records = []
+  complete = 0
+  position = 0
+  valid = 0
+  while position < len(content):
+    end = content.find(b'\n', position)
+    if end < position + 10 or content[position + 8:position + 9] != b' ':
+      break
+    payload = content[position + 9:end]
+    try:
+      if int(content[position:position + 8], 16) != zlib.crc32(payload):
+        break
+      record = decodeJSON(payload)
+    except ValueError:
+      break
+    records.append(record)
+    position = end + 1
+    if not record.get('more'):
+      complete = len(records)
+      valid = position
+  return records[:complete], valid
+
+
+
+
+
+def applyRecord(state, record):
+  """
+  Apply a storage record to recovered state.
+
+  Parameters:
+      state (dict): The 'data', 'passcodes', 'versions' and 'stats' being recovered.
+      record (dict): The record to apply.
+
+  Returns:
+      None
+  """
+  name = record.get('name')
+  if record['op'] == 'drop':
+    for part in ('data', 'passcodes', 'versions', 'stats'):
+      state[part].pop(name, None)
+    return
+
+  if 'passcode' in record:
+    state['passcodes'][name] = record['passcode']
+  entries = state['data'].setdefault(name, {})
+  entries.update(record.get('put', {}))
+  for key in record.get('delete', ()):
+    entries.pop(key, None)
+  key_versions = state['versions'].setdefault(name, {})
+  key_versions.update(record.get('versions', {}))
+  for key in record.get('unversion', ()):
+    key_versions.pop(key, None)
+  if 'stats' in record:
+    state['stats'][name] = record['stats']
+
+
+
+
+
+def loadSnapshotSegment(path):
+  """
+  Load a snapshot segment, checking that it was written completely.
+
+  Parameters:
+      path (str): The path of the segment.
+
+  Returns:
+      dict: The recovered state and the last log sequence the snapshot covers, or None if the segment is damaged.
+  """
+  state = {'data': {}, 'passcodes': {}, 'versions': {}, 'stats': {}}
+  try:
+    records, valid = readSegment(path)
+    end = records.pop() if valid == os.path.getsize(path) and records else None
+    if end is None or end['op'] != 'end' or end['databases'] != sum(1 for record in records if not record.get('more')):
+      return None
+    for record in records:
+      applyRecord(state, record)
+  except (OSError, KeyError, TypeError, AttributeError):
+    return None
+  state['through'] = end['through']
+  return state
+
+
+
+
+
+def recoverStorage(directory):
+  """
+  Recover the data from the newest valid snapshot segment and the log written after it.
+
+  Log segments are replayed in order until a gap or the first torn record, which
+  can only be the tail of the segment being written when the process stopped.
+
+  Parameters:
+      directory (str): The storage directory.
+
+  Returns:
+      dict: The recovered 'data', 'passcodes', 'versions' and 'stats', with 'sequence' (the
+      last segment covered), 'records' (log records replayed), 'clean' (False if the log
+      ended with a torn record or a gap), 'log_bytes', 'damaged' (the paths of damaged
+      snapshots) and 'torn' (the path and valid size of a log segment with a torn tail),
+      or None if the directory holds no segments.
+
+  Raises:
+      RuntimeError: If there are segments but no valid snapshot.
+  """
+  snapshots, logs = listSegments(directory)
+  if not snapshots and not logs:
+    return None
+
+  state = None
+  damaged = []
+  for sequence in sorted(snapshots, reverse=True):
+    state = loadSnapshotSegment(snapshots[sequence])
+    if state is not None:
+      break
+    damaged.append(snapshots[sequence])
+  if state is None:
+    raise RuntimeError('No valid snapshot segment in "{}"; refusing to start with an empty database.'.format(directory))
+
+  sequence = state.pop('through')
+  state.update({'records': 0, 'clean': True, 'log_bytes': 0, 'damaged': damaged, 'torn': None})
+  for log in sorted(number for number in logs if number > sequence):
+    if log != sequence + 1:
+      state['clean'] = False
+      break
+    records, valid = readSegment(logs[log])
+    for record in records:
+      applyRecord(state, record)
+    state['records'] += len(records)
+    state['log_bytes'] += valid
+    sequence = log
+    if valid != os.path.getsize(logs[log]):
+      state['clean'] = False
+      state['torn'] = (logs[log], valid)
+      break
+  state['sequence'] = max([sequence] + list(snapshots) + list(logs))
+  return state
+
+
+
+
+
+def readLegacyFile(path, required):
+  """
+  Read one of the JSON files written before segmented storage.
+
+  Parameters:
+      path (str): The path of the file.
+      required (bool): Whether a corrupted file must stop the startup instead of being ignored.
+
+  Returns:
+      dict: The content of the file, empty if it is missing or empty.
+
+  Raises:
+      RuntimeError: If a required file exists but cannot be parsed.
+  """
+  try:
+    with open(path, 'rb') as openfile:
+      content = openfile.read()
+  except FileNotFoundError:
+    return {}
+  if not content.strip():
+    return {}
+  try:
+    return decodeJSON(content)
+  except ValueError:
+    if required:
+      raise RuntimeError('"{}" is corrupted; refusing to start with an empty database.'.format(path))
+    print('[SERVER] IGNORING CORRUPTED FILE:', path)
+    return {}
+
+
+
+
+
+# Recover the data from the storage directory, or migrate the JSON files of earlier versions
+recovery_started = time.perf_counter()
+recovery = recoverStorage(app.config['STORAGE_DIR'])
+if recovery is None:
+    recovery = {
+        'data': readLegacyFile('database.json', True),
+        'passcodes': readLegacyFile('passcodes.json', True),
+        'versions': readLegacyFile('versions.json', False),
+        'stats': readLegacyFile('stats.json', False),
+        'sequence': 0, 'records': 0, 'clean': False, 'log_bytes': 0, 'damaged': [], 'torn': None
+    }
+data = recovery['data']
+passcodes = recovery['passcodes']
+versions = recovery['versions']
+
+# Give keys written before versions were tracked the version 1 they report
+for name, entries in data.items():
+    key_versions = versions.setdefault(name, {})
+    for key in entries:
+        key_versions.setdefault(key, 1)
+
+# Convert the loaded values when they are kept in compact form
+if app.config['COMPACT_VALUES']:
+    data = {name: {key: storeValue(value) for key, value in entries.items()} for name, entries in data.items()}
+
+# Keep the read and write counts, then recount the keys and sizes from the data itself
+database_stats = {name: stats for name, stats in recovery['stats'].items() if name in data}
+for name in data:
+    rebuildStats(name)
+setMetric('opensource_db_recovery_seconds', time.perf_counter() - recovery_started)
+setMetric('opensource_db_recovered_records', recovery['records'])
+
+
+
+
+
+@app.before_request
+def start_request_timer():
+    """
+    Remember when the request started so its latency can be recorded.
+
+    Returns:
+        None
+    """
+    g.request_started = time.perf_counter()
+
+
+
+
+
+# Endpoints that read or write a whole database and share a bounded number of slots
+EXPENSIVE_ENDPOINTS = {'view_database', 'download_data', 'query_data', 'import_to_database', 'backup_data'}
+
+# Token buckets as [tokens, last refill time], by 'database:<name>' or 'client:<identity>', least recently used first
+rate_buckets = OrderedDict()
+admission_lock = threading.Lock()
+expensive_slots = {'used': 0}
+MAX_RATE_BUCKETS = 10000
+
+
+
+
+
+@app.before_request
+def admit_request():
+    """
+    Shed requests early when a database or client exceeds its rate limit, or when
+    too many expensive requests are already running.
+
+    Returns:
+        None to handle the request, or a JSON response with a status code of 429 and a Retry-After header.
+    """
+    limits = []
+    args = request.view_args or {}
+    name = args.get('name') or args.get('database') or request.args.get('database_name')
+    # Only existing databases get a bucket, so made-up names cannot evict the buckets of real ones
+    if name and name in data and request.endpoint != 'create_database' and app.config['DATABASE_RATE_LIMIT'] > 0:
+        limits.append(('database:' + name, app.config['DATABASE_RATE_LIMIT'], app.config['DATABASE_RATE_BURST'], 'database_rate'))
+    identity = clientIdentity() if app.config['CLIENT_RATE_LIMIT'] > 0 else None
+    if identity:
+        limits.append(('client:' + identity, app.config['CLIENT_RATE_LIMIT'], app.config['CLIENT_RATE_BURST'], 'client_rate'))
+
+    if limits:
+        reason, retry_after = takeRateTokens(limits)
+        if reason is not None:
+            return rejectRequest(reason, retry_after)
+
+    if request.endpoint in EXPENSIVE_ENDPOINTS and app.config['EXPENSIVE_CONCURRENCY'] > 0:
+        with admission_lock:
+            if expensive_slots['used'] >= app.config['EXPENSIVE_CONCURRENCY']:
+                full = True
+            else:
+                expensive_slots['used'] += 1
+                full = False
+        if full:
+            return rejectRequest('concurrency', 1)
+        g.expensive_slot = True
+
+    incrementMetric('opensource_db_admission_total', decision='admitted', reason='none')
+    return None
+
+
+
+
+
+@app.teardown_request
+def release_expensive_slot(error):
+    """
+    Give back the expensive request slot taken by admit_request().
+
+    Parameters:
+        error: The exception raised while handling the request, if any.
+
+    Returns:
+        None
+    """
+    if g.pop('expensive_slot', False):
+        with admission_lock:
+            expensive_slots['used'] -= 1
+
+
+
+
+
+def clientIdentity():
+  """
+  Identify the client of a request by its bearer token or passcode, without validating either.
+
+  Parameters:
+      None
+
+  Returns:
+      str: An identity safe to keep in memory, or None if the request has no credentials.
+  """
+  token = bearerToken()
+  if token is not None:
+    # The signature part is unique per token
+    return 'token:' + token.rpartition('.')[2]
+  passcode = request.args.get('passcode')
+  if passcode:
+    return 'passcode:' + encryptPasscode(passcode)[:32]
+  return None
+
+
+
+
+
+def takeRateTokens(limits):
+  """
+  Take one token from every given bucket, or none if any of them is empty.
+
+  At most MAX_RATE_BUCKETS buckets are kept. The least recently used ones are
+  forgotten first, so made-up passcodes or names cannot grow the table.
+
+  Parameters:
+      limits (list): Tuples of bucket key, rate per second, burst size and rejection reason.
+
+  Returns:
+      tuple: The rejection reason and seconds until a retry may succeed, or (None, 0) if the request is admitted.
+  """
+  now = time.monotonic()
+  with admission_lock:
+    buckets = []
+    for key, rate, burst, reason in limits:
+      bucket = rate_buckets.get(key)
+      if bucket is None:
+        bucket = rate_buckets[key] = [burst, now]
+        while len(rate_buckets) > MAX_RATE_BUCKETS:
+          rate_buckets.popitem(last=False)
+      else:
+        rate_buckets.move_to_end(key)
+      bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+      bucket[1] = now
+      if bucket[0] < 1:
+        return reason, math.ceil((1 - bucket[0]) / rate)
+      buckets.append(bucket)
+
+    for bucket in buckets:
+      bucket[0] -= 1
+  return None, 0
+
+
+
+
+
+def rejectRequest(reason, retry_after):
+  """
+  Build the response of a request shed by admission control.
+
+  Parameters:
+      reason (str): Why the request was rejected.
+      retry_after (int): Seconds after which the client may retry.
+
+  Returns:
+      tuple: A JSON response with a Retry-After header and the HTTP status code 429.
+  """
+  incrementMetric('opensource_db_admission_total', decision='rejected', reason=reason)
+  messages = {
+    'database_rate': 'Too many requests for this database. Try again later.',
+    'client_rate': 'Too many requests with this passcode or token. Try again later.',
+    'concurrency': 'Too many expensive requests are running. Try again later.'
+  }
+  response = jsonResponse({'message': messages[reason], 'retry_after': retry_after})
+  response.headers['Retry-After'] = str(max(int(retry_after), 1))
+  return response, 429
+
+
+
+
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Record the count and latency of a finished request.
+
+    Parameters:
+        response: The Flask response object.
+
+    Returns:
+        The unchanged response object.
+    """
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    started = g.get('request_started')
+    if started is not None:
+        observeMetric('opensource_db_request_duration_seconds', time.perf_counter() - started, route=route, method=request.method)
+    incrementMetric('opensource_db_requests_total', route=route, method=request.method, status=str(response.status_code))
+    return response
+
+
+
+
+
+@app.errorhandler(404)
+def not_found_error(error):
+    """
+    Handle 404 errors by returning a JSON response.
+
+    Parameters:
+        error: Error object.
+
+    Returns:
+        JSON response with error details and status code 404.
+    """
+    return jsonResponse({
+        'message': 'This endpoint is not found or is currently disabled!',
+        'error': str(error)
+    }), 404
+
+
+
+
+
+@app.errorhandler(405)
+def method_not_allowed_error(error):
+    """
+    Handle 405 errors by returning a JSON response.
+
+    Parameters:
+        error: Error object.
+
+    Returns:
+        JSON response with error details and status code 405.
+    """
+    return jsonResponse({
+        'message': 'Try setting the method to either GET, PUT, DELETE or POST. Check the documentation to see which endpoint accepts which kind of method.',
+        'error': str(error)
+    }), 405
+
+
+
+
+
+@app.route('/', methods=['GET'])
+def api_documentation():
+    """
+    Display the API documentation.
+
+    Returns:
+        JSON response with API details and endpoints.
+    """
+    api_documentation = {
+        "api_name": "OpenSource DB",
+        "description": "This API allows you to manage and manipulate data in various databases.",
+        "version": "1.3",
+        "author": "Swastik Bhattacharjee",
+        "data_from": "*",
+        "endpoints": [
+            {
+                "endpoint": "/create_database",
+                "methods": ["POST"],
+                "description": "Creates a new database with the given name.",
+                "parameters": [
+                    {"name": "name", "type": "string", "description": "The name of the database."}
+                ],
+                "response": [
+                    {"status_code": 400, "message": "Database with this name already exists."},
+                    {"status_code": 201, "message": "Database created successfully."},
+                    {"status_code": 400, "message": "Expected a name as an argument."}
+                ],
+                "example": "POST /create_database?name=example_db"
+            },
+            {
+                "endpoint": "/token/<string:name>",
+                "methods": ["POST"],
+                "description": "Exchanges the passcode of a database for a short-lived signed session token, sent afterwards as 'Authorization: Bearer <token>' instead of the passcode.",
+                "parameters": [
+                    {"name": "name", "type": "string", "description": "The name of the database."}
+                ],
+                "request_body": "JSON object with the 'passcode', an optional 'scope' ('write' by default, or 'read') and an optional 'ttl' in seconds (900 by default, at most 86400).",
+                "response": [
+                    {"status_code": 201, "message": "Token issued successfully."},
+                    {"status_code": 400, "message": "Invalid passcode for the database."},
+                    {"status_code": 404, "message": "Database not found."}
+                ],
+                "example": "POST /token/example_db"
+            },
+            {
+                "endpoint": "/revoke_token",
+                "methods": ["POST"],
+                "description": "Revokes the session token sent in the Authorization header.",
+                "parameters": [],
+                "response": [
+                    {"status_code": 200, "message": "Token revoked successfully."},
+                    {"status_code": 401, "message": "Expected a valid bearer token in the Authorization header."}
+                ],
+                "example": "POST /revoke_token"
+            },
+            {
+                "endpoint": "/add_to_database/<string:name>",
+                "methods": ["POST"],
+                "description": "Adds data to the database for the given name.",
+                "parameters": [
+                    {"name": "name", "type": "string", "description": "The name of the database."},
+                    {"name": "key", "type": "string", "description": "The key by which it should be added."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
+                ],
+                "request_body": "JSON data to be added to the database.",
+                "response": [
+                    {"status_code": 201, "message": "Data added to Database successfully. The new version is returned in the body and the ETag header."},
+                    {"status_code": 404, "message": "Database not found."},
+                    {"status_code": 400, "message": "Expected a JSON object to be sent in the request body."}
+                ],
+                "example": "POST /add_to_database/example_db?key=item_key&passcode=pass123"
+            },
+            {
+                "endpoint": "/view_database/<string:name>",
+                "methods": ["GET"],
+                "description": "Retrieves a specific database entry based on the given name.",
+                "parameters": [
+                    {"name": "name", "type": "string", "description": "The name of the database to retrieve."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
+                ],
+                "response": [
+                    {"status_code": 200, "message": "JSON response containing the corresponding database entry."},
+                    {"status_code": 404, "message": "Database not found."}
+                ],
+                "example": "GET /view_database/example_db?passcode=pass123"
+            },
+            {
+                "endpoint": "/delete_database/<string:name>",
+                "methods": ["DELETE"],
+                "description": "Deletes a specific database entry based on the given name.",
+                "parameters": [
+                    {"name": "name", "type": "string", "description": "The name of the database to delete."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
+                ],
+                "response": [
+                    {"status_code": 200, "message": "Database deleted successfully."},
+                    {"status_code": 404, "message": "Database not found."}
+                ],
+                "example": "DELETE /delete_database/example_db?passcode=pass123"
+            },
+            {
+                "endpoint": "/search_in_database/<string:name>",
+                "methods": ["GET"],
+                "description": "Searches for data within a specific database based on the given name.",
+                "parameters": [
+                    {"name": "search_param", "type": "string", "description": "The key to search for within the database."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
+                ],
+                "response": [
+                    {"status_code": 200, "message": "JSON response containing the data matching the search criteria. Its version is returned in the ETag header."},
+                    {"status_code": 404, "message": "Database or search parameter not found."},
+                    {"status_code": 500, "message": "An error occurred while searching the database."}
+                ],
+                "example": "GET /search_in_database/example_db?search_param=item_key&passcode=pass123"
+            },
+            {
+                "endpoint": "/delete_from_database/<string:database>/<string:key>",
+                "methods": ["DELETE"],
+                "description": "Deletes specific data within a database based on the given database name and data key.",
+                "parameters": [
+                    {"name": "database", "type": "string", "description": "The name of the database."},
+                    {"name": "key", "type": "string", "description": "The key of the data to delete."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."},
+                    {"name": "expected_version", "type": "integer", "description": "Optional. Only delete if the key is still at this version. The If-Match header may be used instead."}
+                ],
+                "response": [
+                    {"status_code": 200, "message": "Data deleted successfully."},
+                    {"status_code": 404, "message": "Database or data key not found."},
+                    {"status_code": 409, "message": "Version mismatch, the data was modified by another request."},
+                    {"status_code": 500, "message": "An error occurred while deleting the data."}
+                ],
+                "example": "DELETE /delete_from_database/example_db/item_key?passcode=pass123"
+            },
+            {
+                "endpoint": "/edit_in_database/<string:database>/<string:key>",
+                "methods": ["PUT"],
+                "description": "Edits specific data within a database based on the given database name and data key.",
+                "parameters": [
+                    {"name": "database", "type": "string", "description": "The name of the database."},
+                    {"name": "key", "type": "string", "description": "The key of the data to edit."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."},
+                    {"name": "expected_version", "type": "integer", "description": "Optional. Only edit if the key is still at this version. The If-Match header may be used instead."}
+                ],
+                "request_body": "JSON data with new values to update the existing data.",
+                "response": [
+                    {"status_code": 200, "message": "Data edited successfully. The new version is returned in the body and the ETag header."},
+                    {"status_code": 400, "message": "The request body is not valid JSON, or holds NaN or Infinity."},
+                    {"status_code": 404, "message": "Database or data key not found."},
+                    {"status_code": 409, "message": "Version mismatch, the data was modified by another request."},
+                    {"status_code": 500, "message": "Expected a JSON object to be sent in the request body."}
+                ],
+                "example": "PUT /edit_in_database/example_db/item_key?passcode=pass123&expected_version=2"
+            },
+            {
+                "endpoint": "/transaction/<string:database>",
+                "methods": ["POST"],
+                "description": "Atomically applies several set and delete operations, each guarded by an optional expected version.",
+                "parameters": [
+                    {"name": "database", "type": "string", "description": "The name of the database."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
+                ],
+                "request_body": "JSON object with an 'operations' list of {key, op, value, expected_version}. An expected version of 0 means the key must not exist.",
+                "response": [
+                    {"status_code": 200, "message": "Transaction committed successfully."},
+                    {"status_code": 400, "message": "Invalid list of operations."},
+                    {"status_code": 404, "message": "Database not found."},
+                    {"status_code": 409, "message": "Version mismatch, the transaction was not applied."}
+                ],
+                "example": "POST /transaction/example_db?passcode=pass123"
+            },
+            {
+                "endpoint": "/import/<string:name>",
+                "methods": ["POST"],
+                "description": "Bulk imports {key, value} records streamed as newline-delimited JSON, or as a JSON array when sent as application/json.",
+                "parameters": [
+                    {"name": "name", "type": "string", "description": "The name of the database."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."},
+                    {"name": "on_duplicate", "type": "string", "description": "Optional. 'skip' (default) keeps existing keys, 'overwrite' replaces them."},
+                    {"name": "batch_size", "type": "integer", "description": "Optional. Number of records applied at once, 1000 by default and at most 10000."},
+                    {"name": "persist", "type": "string", "description": "Optional. 'batch' (default) saves after every batch, 'end' saves once at the end."}
+                ],
+                "request_body": "Newline-delimited JSON or a JSON array of {\"key\": ..., \"value\": ...} objects.",
+                "response": [
+                    {"status_code": 200, "message": "Import completed, with the number of imported, rejected and duplicate records."},
+                    {"status_code": 400, "message": "Malformed JSON array, the import stopped early."},
+                    {"status_code": 404, "message": "Database not found."}
+                ],
+                "example": "POST /import/example_db?passcode=pass123"
+            },
+            {
+                "endpoint": "/catalog",
+                "methods": ["GET"],
+                "description": "Lists every database with its key count, value sizes, last modification time and read and write counts, a page at a time. Needs no passcode, so every database name is visible to any client; keys and values are never listed.",
+                "parameters": [
+                    {"name": "page", "type": "integer", "description": "Optional. The page to return, 1 by default."},
+                    {"name": "per_page", "type": "integer", "description": "Optional. Databases per page, 50 by default and at most 500."},
+                    {"name": "sort", "type": "string", "description": "Optional. name, key_count, total_value_bytes, average_value_bytes, last_modified, writes or reads."},
+                    {"name": "order", "type": "string", "description": "Optional. asc or desc."}
+                ],
+                "response": [
+                    {"status_code": 200, "message": "JSON response with one page of databases and the total number of databases and pages."},
+                    {"status_code": 400, "message": "Invalid paging or sorting parameters."}
+                ],
+                "example": "GET /catalog?sort=total_value_bytes&page=1&per_page=20"
+            },
+            {
+                "endpoint": "/stats/<string:name>",
+                "methods": ["GET"],
+                "description": "Returns the statistics of a database without reading its data.",
+                "parameters": [
+                    {"name": "name", "type": "string", "description": "The name of the database."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
+                ],
+                "response": [
+                    {"status_code": 200, "message": "JSON response with the statistics of the database."},
+                    {"status_code": 404, "message": "Database not found."}
+                ],
+                "example": "GET /stats/example_db?passcode=pass123"
+            },
+            {
+                "endpoint": "/download_data/<string:name>",
+                "methods": ["GET"],
+                "description": "Downloads the data of a specific database.",
+                "parameters": [
+                    {"name": "name", "type": "string", "description": "The name of the database to download."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
+                ],
+                "response": [
+                    {"status_code": 200, "message": "JSON response containing the database data."},
+                    {"status_code": 404, "message": "Database not found."}
+                ],
+                "example": "GET /download_data/example_db?passcode=pass123"
+            },
+            {
+                "endpoint": "/backup",
+                "methods": ["POST"],
+                "description": "Trigger data backup.",
+                "parameters": [],
+                "response": [
+                    {"status_code": 200, "message": "Data backup completed successfully."}
+                ],
+                "example": "POST /backup"
+            },
+            {
+                "endpoint": "/query_data",
+                "methods": ["GET"],
+                "description": "Query data in a specific database.",
+                "parameters": [
+                    {"name": "database_name", "type": "string", "description": "The name of the database to query."},
+                    {"name": "search_param", "type": "string", "description": "The search parameter to filter data."},
+                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
+                ],
+                "response": [
+                    {"status_code": 200, "message": "JSON response containing queried data."},
+                    {"status_code": 404, "message": "Database not found."},
+                    {"status_code": 500, "message": "An error occurred while querying the data."}
+                ],
+                "example": "GET /query_data?database_name=example_db&search_param=item_key&passcode=pass123"
+            },
+            {
+                "endpoint": "/health",
+                "methods": ["GET"],
+                "description": "Check the health and status of the API, including the age of the last save and whether the disk is writable.",
+                "parameters": [],
+                "response": [
+                    {"status_code": 200, "message": "API is running and healthy."},
+                    {"status_code": 500, "message": "API is not running as expected."}
+                ],
+                "example": "GET /health"
+            },
+            {
+                "endpoint": "/metrics",
+                "methods": ["GET"],
+                "description": "Request, persistence and storage metrics in the Prometheus text format.",
+                "parameters": [],
+                "response": [
+                    {"status_code": 200, "message": "Plain text metrics."}
+                ],
+                "example": "GET /metrics"
+            }
+        ]
+    }
+    return jsonResponse(api_documentation)
+
+
+
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    """
+    Check the health and status of the API.
+
+    The API is healthy if the background writer and compactor are running, no
+    snapshot has been waiting to be written for too long, the last write and
+    compaction did not fail, no failed append is waiting to be repaired and the
+    storage directory is writable.
+
+    Returns:
+        JSON response indicating whether the API is healthy, with the result of every check.
+    """
+    now = time.time()
+    with snapshot_condition:
+        waiting = now - pending_since if pending_since is not None else 0
+        last_saved = last_save_time
+        save_error = last_save_error
+        damaged = log_damaged
+    with compaction_condition:
+        compaction_error = last_compaction_error
+
+    checks = {
+        'writer_running': snapshot_thread.is_alive(),
+        'pending_save_age_seconds': round(waiting, 3),
+        'last_save_age_seconds': round(now - last_saved, 3) if last_saved is not None else None,
+        'last_save_error': save_error,
+        'log_repair_pending': damaged,
+        'compactor_running': compaction_thread.is_alive(),
+        'last_compaction_error': compaction_error,
+        'disk_writable': isDiskWritable()
+    }
+    is_healthy = (
+        checks['writer_running']
+        and checks['compactor_running']
+        and waiting <= MAX_PENDING_SAVE_AGE
+        and save_error is None
+        and not damaged
+        and compaction_error is None
+        and checks['disk_writable']
+    )
+
+    # Define the response based on the health status.
+    if is_healthy:
+        response = {
+            'status': 'healthy',
+            'message': 'API is running and healthy.',
+            'checks': checks
+        }
+        status_code = 200
+    else:
+        response = {
+            'status': 'unhealthy',
+            'message': 'API is not running as expected.',
+            'checks': checks
+        }
+        status_code = 500
+    return jsonResponse(response), status_code
+
+
+
+
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Expose request, persistence and storage metrics in the Prometheus text format.
+
+    Returns:
+        Plain text response with every metric.
+    """
+    # Read the sizes from the statistics the handlers keep up to date, without walking the data
+    stats = copyStats()
+    setMetric('opensource_db_databases', len(stats))
+    for name, database in stats.items():
+        setMetric('opensource_db_keys', database['key_count'], database=name)
+        setMetric('opensource_db_value_bytes', database['total_value_bytes'], database=name)
+
+    # Forget databases that were deleted since the last scrape
+    with metrics_lock:
+        for key in list(metric_gauges):
+            labels = dict(key[1])
+            if 'database' in labels and labels['database'] not in stats:
+                del metric_gauges[key]
+
+    return renderMetrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+
+
+
+
+def renderMetrics():
+  """
+  Render every metric in the Prometheus text exposition format.
+
+  Parameters:
+      None
+
+  Returns:
+      str: The rendered metrics.
+  """
+  def formatLabels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+      return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs]
+    return '{' + ','.join('{}="{}"'.format(k, v) for k, v in escaped) + '}'
+
+  with metrics_lock:
+    counters = dict(metric_counters)
+    gauges = dict(metric_gauges)
+    histograms = {key: {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']} for key, value in metric_histograms.items()}
+
+  lines = []
+  for name, (kind, description) in METRICS.items():
+    lines.append('# HELP {} {}'.format(name, description))
+    lines.append('# TYPE {} {}'.format(name, kind))
+    if kind == 'histogram':
+      for (metric, labels), histogram in sorted(histograms.items()):
+        if metric != name:
+          continue
+        for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+          lines.append('{}_bucket{} {}'.format(name, formatLabels(labels, [('le', repr(bound))]), count))
+        lines.append('{}_bucket{} {}'.format(name, formatLabels(labels, [('le', '+Inf')]), histogram['count']))
+        lines.append('{}_sum{} {}'.format(name, formatLabels(labels), repr(histogram['sum'])))
+        lines.append('{}_count{} {}'.format(name, formatLabels(labels), histogram['count']))
+    else:
+      samples = counters if kind == 'counter' else gauges
+      for (metric, labels), value in sorted(samples.items()):
+        if metric == name:
+          lines.append('{}{} {}'.format(name, formatLabels(labels), repr(value)))
+  return '\n'.join(lines) + '\n'
+
+
+
+
+
+
+def isDiskWritable():
+  """
+  Check that files can be created in the storage directory.
+
+  Parameters:
+      None
+
+  Returns:
+      bool: True if the data directory is writable, otherwise False.
+  """
+  try:
+    with tempfile.TemporaryFile(dir=app.config['STORAGE_DIR']):
+      pass
+    return True
+  except OSError:
+    return False
+
+
+
+
+
+def validateName(name):
+  """
+  Validate the provided database name.
+
+  Parameters:
+      name (str): The name of the database to validate.
+
+  Returns:
+      tuple: A boolean indicating validity, a JSON response, and an HTTP status code.
+  """
+
+  if len(name) < 4 or len(name) > 25:
+    return False, jsonResponse({'message': 'Database name must be between 4 and 25 characters.'}), 400
+
+  if not str(name[0]).isalpha():
+    return False, jsonResponse({"message": "Database name must start with a letter."}), 400
+
+  if str(name[-1] ) == '_':
+    return False, jsonResponse({'message': 'Database name cannot end with an underscore.'}), 400
+  
+  # Check if the name contains only valid characters
+  valid_grammar = set('abcdefghijklmnopqrstuvwxyz0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_')
+
+  if not set(name).issubset(valid_grammar):
+    return False, jsonResponse({'message': 'Database name contains invalid characters.'}), 400
+
+  return True, jsonResponse({'message': 'Database name is valid'}), 201
+
+  
+
+
+
+def validatePasscode(name, passcode, write=True):
+  """
+  Validate the provided passcode or bearer token for a database.
+
+  A session token sent as 'Authorization: Bearer <token>' is checked first and
+  takes precedence over the passcode.
+
+  Parameters:
+      name (str): The name of the database the passcode belongs to.
+      passcode (str): The passcode to validate.
+      write (bool): Whether the request modifies the database, which read-only tokens may not do.
+
+  Returns:
+      tuple: A boolean indicating validity, a JSON response, and an HTTP status code.
+  """
+  # Check the session token if one is given
+  token = bearerToken()
+  if token is not None:
+    return validateToken(name, token, write)
+
+  # Check if the passcode is given
+  if not passcode:
+    return False, jsonResponse({'message': 'Passcode for the database not provided. Provide a passcode as the parameter'}), 400
+  
+  # Check if the passcode is valid
+  if not verifyPasscode(name, passcode):
+    incrementMetric('opensource_db_auth_total', method='passcode', outcome='invalid')
+    return False, jsonResponse({'message': 'Invalid passcode for the database.'}), 400
+
+  incrementMetric('opensource_db_auth_total', method='passcode', outcome='valid')
+  return True, jsonResponse({'message': 'Valid passcode!.'}), 201
+
+
+
+
+
+# Recently verified tokens, and revoked token ids with their expiry time
+verified_tokens = OrderedDict()
+revoked_tokens = {}
+tokens_lock = threading.Lock()
+VERIFIED_TOKENS_SIZE = 4096
+
+
+
+
+
+def verifyPasscode(name, passcode):
+  """
+  Check a passcode against the stored SHA-256 digest of a database.
+
+  Parameters:
+      name (str): The name of the database.
+      passcode (str): The passcode to check.
+
+  Returns:
+      bool: True if the passcode is correct, otherwise False.
+  """
+  return hmac.compare_digest(encryptPasscode(passcode), passcodes[name]['passcode'])
+
+
+
+
+
+def encodeBase64(raw):
+  """
+  Encode bytes as unpadded URL-safe base64.
+
+  Parameters:
+      raw (bytes): The bytes to encode.
+
+  Returns:
+      str: The encoded text.
+  """
+  return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+
+
+
+def decodeBase64(text):
+  """
+  Decode unpadded URL-safe base64.
+
+  Parameters:
+      text (str): The text written by encodeBase64().
+
+  Returns:
+      bytes: The decoded bytes.
+  """
+  return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+
+
+
+def signToken(payload):
+  """
+  Create a signed session token.
+
+  Parameters:
+      payload (dict): The claims of the token.
+
+  Returns:
+      str: The token, as the encoded payload and its HMAC-SHA256 signature separated by a dot.
+  """
+  body = encodeBase64(encodeJSON(payload))
+  signature = hmac.new(app.config['TOKEN_SECRET'], body.encode('ascii'), hashlib.sha256).digest()
+  return body + '.' + encodeBase64(signature)
+
+
+
+
+
+def readToken(token):
+  """
+  Verify the signature of a session token and return its claims.
+
+  Recently verified tokens are cached, so repeated requests with the same
+  token skip the signature check and the decoding.
+
+  Parameters:
+      token (str): The token sent by the client.
+
+  Returns:
+      dict: The claims of the token, or None if the token is malformed or its signature is wrong.
+  """
+  with tokens_lock:
+    payload = verified_tokens.get(token)
+    if payload is not None:
+      verified_tokens.move_to_end(token)
+      return payload
+
+  try:
+    body, signature = token.split('.')
+    expected = hmac.new(app.config['TOKEN_SECRET'], body.encode('ascii'), hashlib.sha256).digest()
+    if not hmac.compare_digest(decodeBase64(signature), expected):
+      return None
+    payload = decodeJSON(decodeBase64(body))
+  except (ValueError, TypeError):
+    return None
+
+  with tokens_lock:
+    verified_tokens[token] = payload
+    while len(verified_tokens) > VERIFIED_TOKENS_SIZE:
+      verified_tokens.popitem(last=False)
+  return payload
+
+
+
+
+
+def bearerToken():
+  """
+  Get the bearer token from the Authorization header of the request.
+
+  Parameters:
+      None
+
+  Returns:
+      str: The token, or None if no bearer token was sent.
+  """
+  header = request.headers.get('Authorization', '')
+  scheme, _, token = header.partition(' ')
+  if scheme.lower() != 'bearer' or not token.strip():
+    return None
+  return token.strip()
+
+
+
+
+
+def validateToken(name, token, write):
+  """
+  Validate a session token for a database.
+
+  Parameters:
+      name (str): The name of the database.
+      token (str): The token sent by the client.
+      write (bool): Whether the request modifies the database.
+
+  Returns:
+      tuple: A boolean indicating validity, a JSON response, and an HTTP status code.
+  """
+  payload = readToken(token)
+  now = time.time()
+  outcome = None
+  if payload is None:
+    outcome = 'invalid'
+  elif payload.get('exp', 0) <= now:
+    outcome = 'expired'
+  elif payload.get('db') != name or payload.get('jti') in revoked_tokens:
+    outcome = 'invalid'
+  else:
+    # Tokens of a database that was deleted and created again are not valid for the new one
+    info = passcodes.get(name)
+    if info is None or payload.get('iat', 0) < info.get('created_at', 0):
+      outcome = 'invalid'
+
+  if outcome is not None:
+    incrementMetric('opensource_db_auth_total', method='token', outcome=outcome)
+    response = jsonResponse({'message': 'Invalid or expired token for the database.'})
+    response.headers['WWW-Authenticate'] = 'Bearer error="invalid_token"'
+    return False, response, 401
+
+  if write and payload.get('scope') != 'write':
+    incrementMetric('opensource_db_auth_total', method='token', outcome='forbidden')
+    return False, jsonResponse({'message': 'This token is read-only.'}), 403
+
+  incrementMetric('opensource_db_auth_total', method='token', outcome='valid')
+  return True, jsonResponse({'message': 'Valid token!.'}), 201
+
+
+
+
+
+def getVersion(name, key):
+  """
+  Get the current version of a key in a database.
+
+  Keys that existed before versions were tracked report version 1, and keys
+  that do not exist report version 0. The version of a deleted key is kept, so
+  adding the key again continues from it instead of starting over at 1.
+
+  Parameters:
+      name (str): The name of the database.
+      key (str): The key of the data.
+
+  Returns:
+      int: The current version of the key.
+  """
+  if key not in data.get(name, {}):
+    return 0
+  return versions.get(name, {}).get(key, 1)
+
+
+
+
+
+def bumpVersion(name, key):
+  """
+  Increment the version of a key after it has been written.
+
+  Parameters:
+      name (str): The name of the database.
+      key (str): The key of the data that was written.
+
+  Returns:
+      int: The new version of the key.
+  """
+  with data_lock:
+    current = versions.setdefault(name, {}).get(key, 0)
+    versions[name][key] = current + 1
+    return current + 1
+
+
+
+
+
+def parseVersion(value):
+  """
+  Parse a version sent by a client.
+
+  Accepts plain integers as well as ETag style values such as '"3"' or 'W/"3"'.
+
+  Parameters:
+      value: The version sent by the client.
+
+  Returns:
+      int or str: The parsed version, or '*' to match any existing version.
+
+  Raises:
+      ValueError: If the value is not a valid version.
+  """
+  value = str(value).strip()
+  if value == '*':
+    return value
+  if value.startswith('W/'):
+    value = value[2:]
+  version = int(value.strip('"'))
+  if version < 0:
+    raise ValueError(value)
+  return version
+
+
+
+
+
+def expectedVersion():
+  """
+  Read the version a client expects from the If-Match header or the 'expected_version' query parameter.
+
+  Parameters:
+      None
+
+  Returns:
+      tuple: The expected version (or None if not given), a JSON response (or None) and an HTTP status code.
+  """
+  value = request.headers.get('If-Match')
+  if value is None:
+    value = request.args.get('expected_version')
+  if value is None:
+    return None, None, 200
+
+  try:
+    return parseVersion(value), None, 200
+  except ValueError:
+    return None, jsonResponse({'message': 'Expected version must be a non-negative integer.'}), 400
+
+
+
+
+
+def matchesVersion(current, expected):
+  """
+  Check whether the current version of a key satisfies the version a client expects.
+
+  Parameters:
+      current (int): The current version of the key, 0 if it does not exist.
+      expected (int, str or None): The expected version, '*' or None.
+
+  Returns:
+      bool: True if the write may proceed, otherwise False.
+  """
+  if expected is None:
+    return True
+  if expected == '*':
+    return current > 0
+  return current == expected
+
+
+
+
+
+def versionConflict(key, expected, current):
+  """
+  Build the response returned when a compare-and-set fails.
+
+  Parameters:
+      key (str): The key whose version did not match.
+      expected (int or str): The version the client expected.
+      current (int): The current version of the key.
+
+  Returns:
+      tuple: A JSON response and the HTTP status code 409.
+  """
+  response = jsonResponse({
+    'message': 'Version mismatch, the data was modified by another request.',
+    'key': key,
+    'expected_version': expected,
+    'current_version': current
+  })
+  return versioned(response, current), 409
+
+
+
+
+
+def versioned(response, version):
+  """
+  Attach the version of a key to a response as an ETag header.
+
+  Parameters:
+      response: The Flask response object.
+      version (int): The version of the key.
+
+  Returns:
+      The same response object with the ETag header set.
+  """
+  response.headers['ETag'] = '"{}"'.format(version)
+  return response
+
+
+
+
+
+@app.route('/create_database', methods=['POST'])
+def create_database():
+    """
+    Create a new database with the specified name.
+
+    Parameters:
+        None (expects 'name' in the query parameters).
+
+    Returns:
+        JSON response with success or error message.
+    """
+    try:
+        # Get the name parameter from the request
+        name = request.args.get('name')
+
+        # Check if name is given
+        if not name:
+          return jsonResponse({'message': 'Expected a name as an argument.'}), 400
+
+        # Validate the name parameter
+        valid, response, status_code = validateName(name)
+        if not valid:
+          return response, status_code
+
+
+        # Check if a database with the same name already exists
+        if name in data:
+            return jsonResponse({'message': 'Database with this name already exists.'}), 400
+
+        # Create a new database with an empty dictionary
+        passcode = generatePasscode()
+        with data_lock:
+          data[name] = {}
+          versions[name] = {}
+          value_sizes[name] = {}
+          passcodes[name] = {'passcode': encryptPasscode(passcode), 'created_at': time.time()}
+          markDirty(name, reset=True)
+          with stats_lock:
+            database_stats[name] = {'key_count': 0, 'total_value_bytes': 0, 'last_modified': time.time(), 'writes': 0, 'reads': 0}
+
+        saveData()
+    
+        return jsonResponse({
+          'message': 'Database created successfully.',
+          'passcode': passcode,
+          'created_at': time.time()
+        }), 201
+    except:
+        saveData()
+        return jsonResponse({'message': 'Expected a name as an argument.'}), 400
+
+
+
+
+
+@app.route('/token/<string:name>', methods=['POST'])
+def issue_token(name):
+    """
+    Exchange the passcode of a database for a short-lived signed session token.
+
+    Parameters:
+        name (str): The name of the database.
+
+    The passcode, the scope ('write' or 'read') and the lifetime in seconds ('ttl') are read from
+    a JSON request body, falling back to the query parameters. The token is then sent as
+    'Authorization: Bearer <token>' instead of the passcode.
+
+    Returns:
+        JSON response with the token, its scope and expiry time and a status code of 201, or an error message.
+    """
+    try:
+        # Validate the name parameter
+        valid, response, status_code = validateName(name)
+        if not valid:
+          return response, status_code
+
+        if name not in data:
+            return jsonResponse({'message': 'Database not found.'}), 404
+
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            body = {}
+        passcode = body.get('passcode', request.args.get('passcode'))
+        scope = body.get('scope', request.args.get('scope', 'write'))
+        if scope not in ('read', 'write'):
+            return jsonResponse({'message': 'Scope must be either "read" or "write".'}), 400
+        try:
+            ttl = int(body.get('ttl', request.args.get('ttl', app.config['TOKEN_TTL'])))
+        except (TypeError, ValueError):
+            return jsonResponse({'message': 'Token lifetime must be an integer number of seconds.'}), 400
+        ttl = min(max(ttl, 1), app.config['MAX_TOKEN_TTL'])
+
+        # Only a passcode can be exchanged for a token
+        if not passcode or not isinstance(passcode, str):
+            return jsonResponse({'message': 'Passcode for the database not provided. Provide a passcode as the parameter'}), 400
+        if not verifyPasscode(name, passcode):
+            incrementMetric('opensource_db_auth_total', method='passcode', outcome='invalid')
+            return jsonResponse({'message': 'Invalid passcode for the database.'}), 400
+        incrementMetric('opensource_db_auth_total', method='passcode', outcome='valid')
+
+        now = time.time()
+        token = signToken({'db': name, 'scope': scope, 'iat': now, 'exp': now + ttl, 'jti': secrets.token_hex(8)})
+        return jsonResponse({
+          'message': 'Token issued successfully.',
+          'token': token,
+          'token_type': 'Bearer',
+          'scope': scope,
+          'expires_at': now + ttl
+        }), 201
+    except Exception as e:
+        saveData()
+        print("Exception:-", e)
+        return jsonResponse({'message': 'An error occurred while issuing the token.'}), 500
+
+
+
+
+
+
+@app.route('/revoke_token', methods=['POST'])
+def revoke_token():
+    """
+    Revokes the session token sent in the Authorization header.
+
+    Returns:
+        JSON response with a status code of 200 if the token was revoked, or 401 if it is not a valid token.
+    """
+    token = bearerToken()
+    payload = readToken(token) if token is not None else None
+    if payload is None or 'jti' not in payload:
+        return jsonResponse({'message': 'Expected a valid bearer token in the Authorization header.'}), 401
+
+    now = time.time()
+    with tokens_lock:
+        # Forget revoked tokens that have expired anyway
+        for jti in [jti for jti, expires in revoked_tokens.items() if expires <= now]:
+            del revoked_tokens[jti]
+        revoked_tokens[payload['jti']] = payload.get('exp', now)
+        verified_tokens.pop(token, None)
+    return jsonResponse({'message': 'Token revoked successfully.'}), 200
+
+
+
+
+
+
+@app.route('/add_to_database/<string:name>', methods=['POST'])
+def add_to_database(name):
+    """
+    Add data to a specified database.
+
+    Parameters:
+        name (str): The name of the database.
+
+    Returns:
+        JSON response with success or error message.
+    """
+    try:
+      # Validate the name parameter
+      valid, response, status_code = validateName(name)
+      if not valid:
+        return response, status_code
+
+      # Get the name parameter from the request
+      if not (name in data):
+        return jsonResponse({'message': 'Database not found.'}), 404
+
+
+      passcode = request.args.get('passcode')
+
+      # Validate the passcode
+      valid, response, status_code = validatePasscode(name, passcode)
+      if not valid:
+        return response, status_code
+
+
+      # Assuming JSON data is sent in the request body
+      data_to_add = request.json
+      
+
+      # Get the name parameter from the request
+      key = request.args.get('key')
+      
+      
+      if key:
+        key = str(key)
+        stored = storeValue(data_to_add)
+        size = valueSize(stored)
+        with data_lock:
+          old = data[name].get(key, NO_VALUE)
+          data[name][key] = stored
+          version = bumpVersion(name, key)
+          recordWrite(name, key, old, stored, size)
+          markDirty(name, key)
+        saveData()
+        return versioned(jsonResponse({'message': 'Data added to Database successfully.', 'version': version}), version), 201
+      else:
+        return jsonResponse({'message': 'Data key not found in the database.'}), 404
+          
+    except:
+      saveData()
+      return jsonResponse({'message': 'Expected a JSON object and a parameter termed "name" to be sent in the request body.'}), 400
+
+
+
+
+
+
+@app.route('/view_database/<string:name>', methods=['GET'])
+def view_database(name):
+    """
+    Retrieve the contents of a specific database.
+
+    Parameters:
+        name (str): The name of the database.
+
+    Returns:
+        JSON response containing the database contents or an error message.
+    """
+    # Validate the name parameter
+    valid, response, status_code = validateName(name)
+    if not valid:
+      return response, status_code
+
+    # Check if the database exists in the 'data' dictionary
+    if name in data:
+      passcode = request.args.get('passcode')
+
+      # Validate the passcode
+      valid, response, status_code = validatePasscode(name, passcode, write=False)
+      if not valid:
+        return response, status_code
+
+      # Return the corresponding database entry as a JSON response
+      adjustStats(name, reads=1)
+      return databaseResponse(name)
+    else:
+        # Return a JSON response with a 'message' key set to 'Database not found.' and a status code of 404
+        return jsonResponse({'message': 'Database not found.'}), 404
+    
+
+
+
+
+
+@app.route('/delete_database/<string:name>', methods=['DELETE'])
+def delete_database(name):
+    """
+    Deletes a specific database entry based on the given name.
+
+    Parameters:
+        name (str): The name of the database to delete.
+
+    Returns:
+        If the database exists, returns a JSON response with a 'message' key set to 'Database deleted successfully.' and a status code of 200.
+        If the database does not exist, returns a JSON response with a 'message' key set to 'Database not found.' and a status code of 404.
+    """
+  
+    # Validate the name parameter
+    valid, response, status_code = validateName(name)
+    if not valid:
+      return response, status_code
+
+    # Check if the database exists in the 'data' dictionary
+    if name in data:
+        passcode = request.args.get('passcode')
+
+        # Validate the passcode
+        valid, response, status_code = validatePasscode(name, passcode)
+        if not valid:
+          return response, status_code
+
+        # Delete the corresponding database entry
+        with data_lock:
+          del data[name]
+          passcodes.pop(name, None)
+          versions.pop(name, None)
+          value_sizes.pop(name, None)
+          markDirty(name, reset=True)
+          with stats_lock:
+            database_stats.pop(name, None)
+        # Return a JSON response with a 'message' key set to 'Database deleted successfully.' and a status code of 200
+        saveData()
+        return jsonResponse({'message': 'Database deleted successfully.'}), 200
+    else:
+        # Return a JSON response with a 'message' key set to 'Database not found.' and a status code of 404
+        return jsonResponse({'message': 'Database not found.'}), 404
+    
+
+
+
+
+
+
+@app.route('/search_in_database/<string:name>', methods=['GET'])
+def search_in_database(name):
+    """
+    Searches for data within a specific database based on the given name.
+
+    Parameters:
+        name (str): The name of the database to search within.
+
+    Returns:
+        If the database exists, returns a JSON response containing the data matching the search criteria.
+        If the database does not exist or the search parameter is not found, returns a JSON response with a 'message' key set to 'Database or search parameter not found.' and a status code of 404.
+    """
+    try:
+  
+        # Validate the name parameter
+        valid, response, status_code = validateName(name)
+        if not valid:
+          return response, status_code
+
+        if name in data:
+          passcode = request.args.get('passcode')
+
+          # Validate the passcode
+          valid, response, status_code = validatePasscode(name, passcode, write=False)
+          if not valid:
+            return response, status_code
+
+          search_param = request.args.get('search_param')
+
+          # Check if the search parameter exists in the database
+          if search_param in data[name]:
+              adjustStats(name, reads=1)
+              # Return the matching data as a JSON response, tagged with its version
+              with data_lock:
+                value = data[name][search_param]
+                version = getVersion(name, search_param)
+              return versioned(jsonResponse(responseValue(value)), version)
+          else:
+              return jsonResponse({'message': 'Search parameter not found in the database.'}), 404
+        else:
+            return jsonResponse({'message': 'Database not found.'}), 404
+    except:
+        return jsonResponse({'message': 'An error occurred while searching the database.'}), 500
+    
+
+
+
+
+
+
+@app.route('/delete_from_database/<string:database>/<string:key>', methods=['DELETE'])
+def delete_from_database(database, key):
+    """
+    Deletes specific data within a database based on the given database name and data key.
+
+    Parameters:
+        database (str): The name of the database.
+        key (str): The key of the data to delete.
+
+    Returns:
+        If the database and data key exist, deletes the data and returns a JSON response with a 'message' key set to 'Data deleted successfully.' and a status code of 200.
+        If the database or data key do not exist, returns a JSON response with a 'message' key set to 'Database or data key not found.' and a status code of 404.
+    """
+    try:
+        # Validate the name parameter
+        valid, response, status_code = validateName(database)
+        if not valid:
+          return response, status_code
+
+        if database in data:
+            passcode = request.args.get('passcode')
+
+            # Validate the passcode
+            valid, response, status_code = validatePasscode(database, passcode)
+            if not valid:
+              return response, status_code
+
+            expected, response, status_code = expectedVersion()
+            if response is not None:
+              return response, status_code
+
+            with data_lock:
+              if key not in data[database]:
+                return jsonResponse({'message': 'Data key not found in the database.'}), 404
+
+              # Refuse the delete if the key changed since the client read it
+              current = getVersion(database, key)
+              if not matchesVersion(current, expected):
+                return versionConflict(key, expected, current)
+
+              # Keep the version of the deleted key, so a key added again later never repeats it
+              recordDelete(database, key, data[database].pop(key))
+              markDirty(database, key)
+            saveData()
+            return jsonResponse({'message': 'Data deleted successfully.'}), 200
+        else:
+            return jsonResponse({'message': 'Database not found.'}), 404
+    except Exception as e:
+        saveData()
+        print("Exception:-", e)
+        return jsonResponse({'message': 'An error occurred while deleting the data.'}), 500
+      
+    
+
+
+
+
+
+@app.route('/edit_in_database/<string:database>/<string:key>', methods=['PUT'])
+def edit_in_database(database, key):
+    """
+    Edits specific data within a database based on the given database name and data key.
+
+    Parameters:
+        database (str): The name of the database.
+        key (str): The key of the data to edit.
+
+    Returns:
+        If the database and data key exist, edits the data with new values provided in the request body
+        and returns a JSON response with a 'message' key set to 'Data edited successfully.' and a status code of 200.
+        If the database or data key do not exist, returns a JSON response with a 'message' key set to 'Database or data key not found.' and a status code of 404.
+    """
+    try:
+        # Validate the name parameter
+        valid, response, status_code = validateName(database)
+        if not valid:
+          return response, status_code
+
+        if database in data:
+            passcode = request.args.get('passcode')
+
+            # Validate the passcode
+            valid, response, status_code = validatePasscode(database, passcode)
+            if not valid:
+              return response, status_code
+
+            expected, response, status_code = expectedVersion()
+            if response is not None:
+              return response, status_code
+
+            key = str(key)
+            new_data = request.json  # Assuming JSON data with new values is sent in the request body
+            stored = storeValue(new_data)
+            size = valueSize(stored)
+            with data_lock:
+              if key not in data[database]:
+                return jsonResponse({'message': 'Data key not found in the database.'}), 404
+
+              # Refuse the edit if the key changed since the client read it
+              current = getVersion(database, key)
+              if not matchesVersion(current, expected):
+                return versionConflict(key, expected, current)
+
+              recordWrite(database, key, data[database][key], stored, size)
+              data[database][key] = stored
+              version = bumpVersion(database, key)
+              markDirty(database, key)
+            saveData()
+            return versioned(jsonResponse({'message': 'Data edited successfully.', 'version': version}), version), 200
+        else:
+            return jsonResponse({'message': 'Database not found.'}), 404
+    except BadRequest:
+        return jsonResponse({'message': 'Expected a JSON object to be sent in the request body.'}), 400
+    except:
+        saveData()
+        return jsonResponse({'message': 'Expected a JSON object to be sent in the request body.'}), 500
+
+
+
+
+
+@app.route('/transaction/<string:database>', methods=['POST'])
+def transaction(database):
+    """
+    Atomically applies several writes to a database using compare-and-set.
+
+    Parameters:
+        database (str): The name of the database.
+
+    The request body is a JSON object with an 'operations' list. Each operation has a 'key',
+    an 'op' ('set' or 'delete'), a 'value' for 'set' and an optional 'expected_version'.
+    An expected version of 0 means the key must not exist yet.
+
+    Returns:
+        If every expected version matches, applies all operations, saves the data once and returns
+        a JSON response with the new version of every key and a status code of 200.
+        If any expected version does not match, applies nothing and returns the conflicts with a status code of 409.
+    """
+    try:
+        # Validate the name parameter
+        valid, response, status_code = validateName(database)
+        if not valid:
+          return response, status_code
+
+        if database not in data:
+            return jsonResponse({'message': 'Database not found.'}), 404
+
+        passcode = request.args.get('passcode')
+
+        # Validate the passcode
+        valid, response, status_code = validatePasscode(database, passcode)
+        if not valid:
+          return response, status_code
+
+        body = request.json
+        operations = body.get('operations') if isinstance(body, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return jsonResponse({'message': 'Expected a non-empty list termed "operations" in the request body.'}), 400
+
+        # Validate every operation before touching the data
+        parsed = []
+        seen = set()
+        for operation in operations:
+            if not isinstance(operation, dict) or 'key' not in operation:
+                return jsonResponse({'message': 'Every operation must be a JSON object with a "key".'}), 400
+            key = str(operation['key'])
+            op = operation.get('op', 'set')
+            if op not in ('set', 'delete'):
+                return jsonResponse({'message': 'Operation must be either "set" or "delete".', 'key': key}), 400
+            if op == 'set' and 'value' not in operation:
+                return jsonResponse({'message': 'A "set" operation requires a "value".', 'key': key}), 400
+            if key in seen:
+                return jsonResponse({'message': 'A key may only appear once in a transaction.', 'key': key}), 400
+            seen.add(key)
+            expected = operation.get('expected_version')
+            try:
+                expected = None if expected is None else parseVersion(expected)
+            except ValueError:
+                return jsonResponse({'message': 'Expected version must be a non-negative integer.', 'key': key}), 400
+            # Encode the new values before taking the lock
+            stored = storeValue(operation['value']) if op == 'set' else None
+            parsed.append((key, op, stored, valueSize(stored) if op == 'set' else 0, expected))
+
+        with data_lock:
+            # Check every version first so the transaction commits all or nothing
+            conflicts = []
+            for key, op, stored, size, expected in parsed:
+                current = getVersion(database, key)
+                if not matchesVersion(current, expected) or (op == 'delete' and current == 0):
+                    conflicts.append({'key': key, 'expected_version': expected, 'current_version': current})
+            if conflicts:
+                return jsonResponse({
+                    'message': 'Version mismatch, the transaction was not applied.',
+                    'conflicts': conflicts
+                }), 409
+
+            new_versions = {}
+            for key, op, stored, size, expected in parsed:
+                if op == 'set':
+                    recordWrite(database, key, data[database].get(key, NO_VALUE), stored, size)
+                    data[database][key] = stored
+                    new_versions[key] = bumpVersion(database, key)
+                else:
+                    recordDelete(database, key, data[database].pop(key))
+                    new_versions[key] = None
+                markDirty(database, key)
+
+            # Persist the whole transaction in a single step
+            saveData()
+
+        return jsonResponse({'message': 'Transaction committed successfully.', 'versions': new_versions}), 200
+    except Exception as e:
+        saveData()
+        print("Exception:-", e)
+        return jsonResponse({'message': 'Expected a JSON object with a list of operations to be sent in the request body.'}), 400
+    
+
+
+
+
+
+
+@app.route('/import/<string:name>', methods=['POST'])
+def import_to_database(name):
+    """
+    Bulk imports records into a database from a streamed request body.
+
+    Parameters:
+        name (str): The name of the database.
+
+    The body is either newline-delimited JSON (one {"key": ..., "value": ...} object per line)
+    or, when sent as application/json, a JSON array of such objects. The body is parsed as it
+    arrives and applied in batches, so memory use does not grow with the size of the upload.
+    Keys that already exist are skipped unless 'on_duplicate' is 'overwrite'. The data is saved
+    after every batch, or once at the end when 'persist' is 'end'.
+
+    Returns:
+        JSON response with the number of imported, rejected and duplicate records and a status code of 200.
+        If a JSON array is malformed, the import stops and the counts so far are returned with a status code of 400.
+    """
+    try:
+        # Validate the name parameter
+        valid, response, status_code = validateName(name)
+        if not valid:
+          return response, status_code
+
+        if name not in data:
+            return jsonResponse({'message': 'Database not found.'}), 404
+
+        passcode = request.args.get('passcode')
+
+        # Validate the passcode
+        valid, response, status_code = validatePasscode(name, passcode)
+        if not valid:
+          return response, status_code
+
+        on_duplicate = request.args.get('on_duplicate', 'skip')
+        persist = request.args.get('persist', 'batch')
+        if on_duplicate not in ('skip', 'overwrite') or persist not in ('end', 'batch'):
+            return jsonResponse({'message': 'Expected "on_duplicate" to be skip or overwrite and "persist" to be end or batch.'}), 400
+        try:
+            batch_size = int(request.args.get('batch_size', IMPORT_BATCH_SIZE))
+        except ValueError:
+            return jsonResponse({'message': 'Batch size must be an integer.'}), 400
+        batch_size = min(max(batch_size, 1), MAX_IMPORT_BATCH_SIZE)
+
+        if request.mimetype == 'application/json':
+            records = iterJSONArray(request.stream)
+        else:
+            records = iterNDJSON(request.stream)
+
+        counts = {'imported': 0, 'rejected': 0, 'duplicates': 0, 'batches': 0}
+        batch = {}
+        malformed = False
+        for record in records:
+            if record is IMPORT_MALFORMED:
+                counts['rejected'] += 1
+                malformed = True
+                break
+            if not isinstance(record, dict) or 'key' not in record or 'value' not in record \
+                    or not isinstance(record['key'], (str, int, float)) or isinstance(record['key'], bool):
+                counts['rejected'] += 1
+                continue
+
+            key = str(record['key'])
+            if key in batch:
+                counts['duplicates'] += 1
+                if on_duplicate == 'skip':
+                    continue
+            batch[key] = record['value']
+
+            if len(batch) >= batch_size:
+                applyImportBatch(name, batch, on_duplicate, counts, persist == 'batch')
+                batch = {}
+        if batch:
+            applyImportBatch(name, batch, on_duplicate, counts, persist == 'batch')
+
+        incrementMetric('opensource_db_import_records_total', counts['imported'], outcome='imported')
+        incrementMetric('opensource_db_import_records_total', counts['rejected'], outcome='rejected')
+        incrementMetric('opensource_db_import_records_total', counts['duplicates'], outcome='duplicate')
+        saveData()
+
+        if malformed:
+            return jsonResponse(dict(counts, message='Malformed JSON array, the import stopped early.')), 400
+        return jsonResponse(dict(counts, message='Import completed.')), 200
+    except Exception as e:
+        saveData()
+        print("Exception:-", e)
+        return jsonResponse({'message': 'An error occurred while importing the data.'}), 500
+
+
+
+
+
+
+# Markers yielded by the import parsers for a line that could not be parsed and for a malformed array
+IMPORT_REJECTED = object()
+IMPORT_MALFORMED = object()
+
+
+
+
+
+def applyImportBatch(name, batch, on_duplicate, counts, persist):
+  """
+  Apply one batch of imported records to a database.
+
+  Parameters:
+      name (str): The name of the database.
+      batch (dict): The keys and values to import.
+      on_duplicate (str): 'skip' to keep existing keys, 'overwrite' to replace them.
+      counts (dict): The running counts of the import, updated in place.
+      persist (bool): Whether to save the data after the batch.
+
+  Returns:
+      None
+  """
+  # Encode the values before taking the lock
+  prepared = {}
+  for key, value in batch.items():
+    stored = storeValue(value)
+    prepared[key] = (stored, valueSize(stored))
+
+  with data_lock:
+    # The database may have been deleted while the upload was streaming
+    entries = data.get(name)
+    if entries is None:
+      counts['rejected'] += len(batch)
+      return
+    key_versions = versions.setdefault(name, {})
+    added_keys = 0
+    added_bytes = 0
+    writes = 0
+    sizes = value_sizes.setdefault(name, {})
+    for key, (stored, size) in prepared.items():
+      old = entries.get(key, NO_VALUE)
+      if old is not NO_VALUE:
+        counts['duplicates'] += 1
+        if on_duplicate == 'skip':
+          continue
+      added_bytes += size - storedSize(name, key, old)
+      if not isinstance(stored, CompactValue):
+        sizes[key] = size
+      entries[key] = stored
+      key_versions[key] = key_versions.get(key, 0) + 1
+      markDirty(name, key)
+      added_keys += old is NO_VALUE
+      writes += 1
+      counts['imported'] += 1
+    adjustStats(name, keys=added_keys, value_bytes=added_bytes, writes=writes)
+  counts['batches'] += 1
+
+  if persist:
+    saveData()
+
+
+
+
+
+def iterNDJSON(stream):
+  """
+  Parse newline-delimited JSON from a stream, reading it in chunks.
+
+  Parameters:
+      stream: A binary file-like object.
+
+  Yields:
+      The parsed value of every non-empty line, or IMPORT_REJECTED for a line that is not valid JSON or too long.
+  """
+  pending = b''
+  skipping = False
+  while True:
+    # Read at least as much as is already pending so a long line is not copied too often
+    chunk = stream.read(max(IMPORT_CHUNK_SIZE, len(pending)))
+    if not chunk:
+      break
+
+    # Drop the rest of a line that is longer than the limit
+    if skipping:
+      newline = chunk.find(b'\n')
+      if newline < 0:
+        continue
+      chunk = chunk[newline + 1:]
+      skipping = False
+      yield IMPORT_REJECTED
+
+    lines = (pending + chunk).split(b'\n')
+    pending = lines.pop()
+    for line in lines:
+      if line.strip():
+        yield parseImportLine(line)
+
+    if len(pending) > MAX_IMPORT_RECORD_BYTES:
+      pending = b''
+      skipping = True
+
+  if skipping:
+    yield IMPORT_REJECTED
+  elif pending.strip():
+    yield parseImportLine(pending)
+
+
+
 
 
+def parseImportLine(line):
+  """
+  Parse one line of newline-delimited JSON.
 
+  Uses the json module like request.json and iterJSONArray(), so a record is
+  stored the same way whatever the format it was sent in.
 
+  Parameters:
+      line (bytes): The line to parse.
 
-# Create a Flask application
-app = Flask(__name__)
+  Returns:
+      The parsed value, or IMPORT_REJECTED if the line is not valid JSON.
+  """
+  if len(line) > MAX_IMPORT_RECORD_BYTES:
+    return IMPORT_REJECTED
+  try:
+    return json.loads(line, parse_constant=rejectConstant)
+  except ValueError:
+    return IMPORT_REJECTED
 
-# Set the path to your favicon file
-app.config['FAVICON'] = 'logo.ico'
 
-# Set the name of your API
-app.name = 'OpenSource DB'
 
-# Create a dictionary to store the data
-data = {}
-passcodes = {}
 
 
+def iterJSONArray(stream):
+  """
+  Parse the elements of a JSON array from a stream without reading the whole array.
+
+  Parameters:
+      stream: A binary file-like object.
+
+  Yields:
+      Every element of the array, then IMPORT_MALFORMED if the array is not valid JSON.
+  """
+  decoder = json.JSONDecoder(parse_constant=rejectConstant)
+  utf8 = codecs.getincrementaldecoder('utf-8')()
+  buffer = ''
+  position = 0
+  finished = False
+  started = False
+
+  def fill():
+    # Read another chunk, returning False at the end of the stream. The chunk grows with
+    # the unparsed part of the buffer so a large element is not re-parsed too often.
+    nonlocal buffer, position, finished
+    chunk = stream.read(max(IMPORT_CHUNK_SIZE, len(buffer) - position))
+    if not chunk:
+      buffer += utf8.decode(b'', final=True)
+      finished = True
+      return False
+    buffer = buffer[position:] + utf8.decode(chunk)
+    position = 0
+    return True
+
+  while True:
+    # Skip whitespace, then expect '[' at the start, and ',' or ']' between elements
+    while position < len(buffer) and buffer[position].isspace():
+      position += 1
+    if position >= len(buffer):
+      if fill() or position < len(buffer):
+        continue
+      if started or buffer.strip():
+        yield IMPORT_MALFORMED
+      return
+
+    character = buffer[position]
+    if not started:
+      if character != '[':
+        yield IMPORT_MALFORMED
+        return
+      started = True
+      position += 1
+      expect_value = True
+      continue
+    if character == ']':
+      return
+    if not expect_value:
+      if character != ',':
+        yield IMPORT_MALFORMED
+        return
+      position += 1
+      expect_value = True
+      continue
 
+    try:
+      value, end = decoder.raw_decode(buffer, position)
+    except ValueError:
+      # The element may simply not have arrived yet
+      if len(buffer) - position > MAX_IMPORT_RECORD_BYTES or not fill():
+        yield IMPORT_MALFORMED
+        return
+      continue
 
+    # A number at the very end of a chunk may continue in the next one
+    if end == len(buffer) and not finished and fill():
+      continue
+    position = end
+    expect_value = False
+    yield value
 
-# Load existing data and passcodes from files
-try:
-    with open('database.json', 'r') as openfile:
-        data = json.load(openfile)
-    with open('passcodes.json', 'r') as openfile:
-        passcodes = json.load(openfile)
-except:
-    data = {}
-    passcodes = {}
 
 
 
 
 
-@app.errorhandler(404)
-def not_found_error(error):
+@app.route('/catalog', methods=['GET'])
+def catalog():
     """
-    Handle 404 errors by returning a JSON response.
+    Lists every database with its statistics, a page at a time. No passcode is needed, so every
+    database name is visible to any client; keys and values are never listed.
 
     Parameters:
-        error: Error object.
+        None (expects optional 'page', 'per_page', 'sort' and 'order' in the query parameters).
+
+    'sort' is one of name (default), key_count, total_value_bytes, average_value_bytes,
+    last_modified, writes or reads. 'order' is asc (default for name) or desc (default otherwise).
 
     Returns:
-        JSON response with error details and status code 404.
+        JSON response with one page of databases and the total number of databases and pages.
     """
-    saveData()
-    return jsonify({
-        'message': 'This endpoint is not found or is currently disabled!',
-        'error': str(error)
-    }), 404
+    sort = request.args.get('sort', 'name')
+    if sort not in CATALOG_SORT_KEYS:
+        return jsonResponse({'message': 'Sort must be one of ' + ', '.join(CATALOG_SORT_KEYS) + '.'}), 400
+    order = request.args.get('order', 'asc' if sort == 'name' else 'desc')
+    if order not in ('asc', 'desc'):
+        return jsonResponse({'message': 'Order must be either "asc" or "desc".'}), 400
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 50)), 1), 500)
+    except ValueError:
+        return jsonResponse({'message': 'Page and per_page must be integers.'}), 400
 
+    with data_lock:
+        names = list(data)
+    stats = copyStats()
+    empty = {'key_count': 0, 'total_value_bytes': 0, 'last_modified': None, 'writes': 0, 'reads': 0}
 
+    def sortKey(name):
+        entry = stats.get(name, empty)
+        if sort == 'name':
+            return name
+        if sort == 'average_value_bytes':
+            return entry['total_value_bytes'] / entry['key_count'] if entry['key_count'] else 0
+        return entry[sort] or 0
 
+    names.sort(key=sortKey, reverse=order == 'desc')
+    start = (page - 1) * per_page
+    return jsonResponse({
+        'databases': [describeDatabase(name) for name in names[start:start + per_page]],
+        'page': page,
+        'per_page': per_page,
+        'total': len(names),
+        'pages': (len(names) + per_page - 1) // per_page
+    })
 
 
-@app.errorhandler(405)
-def method_not_allowed_error(error):
+
+
+
+
+@app.route('/stats/<string:name>', methods=['GET'])
+def database_statistics(name):
     """
-    Handle 405 errors by returning a JSON response.
+    Returns the statistics of a database without reading its data.
 
     Parameters:
-        error: Error object.
+        name (str): The name of the database.
 
     Returns:
-        JSON response with error details and status code 405.
+        JSON response with the key count, total and average value size, last modification time,
+        write and read counts, or an error message.
     """
-    saveData()
-    return jsonify({
-        'message': 'Try setting the method to either GET, PUT, DELETE or POST. Check the documentation to see which endpoint accepts which kind of method.',
-        'error': str(error)
-    }), 405
+    # Validate the name parameter
+    valid, response, status_code = validateName(name)
+    if not valid:
+      return response, status_code
 
+    if name not in data:
+        return jsonResponse({'message': 'Database not found.'}), 404
 
+    passcode = request.args.get('passcode')
 
+    # Validate the passcode
+    valid, response, status_code = validatePasscode(name, passcode, write=False)
+    if not valid:
+      return response, status_code
 
+    return jsonResponse(describeDatabase(name))
 
-@app.route('/', methods=['GET'])
-def api_documentation():
-    """
-    Display the API documentation.
 
-    Returns:
-        JSON response with API details and endpoints.
+
+
+
+
+@app.route('/download_data/<string:name>', methods=['GET'])
+def download_data(name):
+    # Validate the name parameter
+    valid, response, status_code = validateName(name)
+    if not valid:
+      return response, status_code
+
+    # Check if the database exists in the 'data' dictionary
+    if name in data:
+      passcode = request.args.get('passcode')
+
+      # Validate the passcode
+      valid, response, status_code = validatePasscode(name, passcode, write=False)
+      if not valid:
+        return response, status_code
+
+
+      # Return the corresponding database entry as a JSON response
+      adjustStats(name, reads=1)
+      return databaseResponse(name)
+    else:
+        # Return a JSON response with a 'message' key set to 'Database not found.' and a status code of 404
+        return jsonResponse({'message': 'Database not found.'}), 404
+
+
+
+
+
+
+
+@app.route('/query_data', methods=['GET'])
+def query_data():
     """
-    api_documentation = {
-        "api_name": "OpenSource DB",
-        "description": "This API allows you to manage and manipulate data in various databases.",
-        "version": "1.3",
-        "author": "Swastik Bhattacharjee",
-        "data_from": "*",
-        "endpoints": [
-            {
-                "endpoint": "/create_database",
-                "methods": ["POST"],
-                "description": "Creates a new database with the given name.",
-                "parameters": [
-                    {"name": "name", "type": "string", "description": "The name of the database."}
-                ],
-                "response": [
-                    {"status_code": 400, "message": "Database with this name already exists."},
-                    {"status_code": 201, "message": "Database created successfully."},
-                    {"status_code": 400, "message": "Expected a name as an argument."}
-                ],
-                "example": "POST /create_database?name=example_db"
-            },
-            {
-                "endpoint": "/add_to_database/<string:name>",
-                "methods": ["POST"],
-                "description": "Adds data to the database for the given name.",
-                "parameters": [
-                    {"name": "name", "type": "string", "description": "The name of the database."},
-                    {"name": "key", "type": "string", "description": "The key by which it should be added."},
-                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
-                ],
-                "request_body": "JSON data to be added to the database.",
-                "response": [
-                    {"status_code": 201, "message": "Data added to Database successfully."},
-                    {"status_code": 404, "message": "Database not found."},
-                    {"status_code": 400, "message": "Expected a JSON object to be sent in the request body."}
-                ],
-                "example": "POST /add_to_database/example_db?key=item_key&passcode=pass123"
-            },
-            {
-                "endpoint": "/view_database/<string:name>",
-                "methods": ["GET"],
-                "description": "Retrieves a specific database entry based on the given name.",
-                "parameters": [
-                    {"name": "name", "type": "string", "description": "The name of the database to retrieve."},
-                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
-                ],
-                "response": [
-                    {"status_code": 200, "message": "JSON response containing the corresponding database entry."},
-                    {"status_code": 404, "message": "Database not found."}
-                ],
-                "example": "GET /view_database/example_db?passcode=pass123"
-            },
-            {
-                "endpoint": "/delete_database/<string:name>",
-                "methods": ["DELETE"],
-                "description": "Deletes a specific database entry based on the given name.",
-                "parameters": [
-                    {"name": "name", "type": "string", "description": "The name of the database to delete."},
-                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
-                ],
-                "response": [
-                    {"status_code": 200, "message": "Database deleted successfully."},
-                    {"status_code": 404, "message": "Database not found."}
-                ],
-                "example": "DELETE /delete_database/example_db?passcode=pass123"
-            },
-            {
-                "endpoint": "/search_in_database/<string:name>",
-                "methods": ["GET"],
-                "description": "Searches for data within a specific database based on the given name.",
-                "parameters": [
-                    {"name": "search_param", "type": "string", "description": "The key to search for within the database."},
-                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
-                ],
-                "response": [
-                    {"status_code": 200, "message": "JSON response containing the data matching the search criteria."},
-                    {"status_code": 404, "message": "Database or search parameter not found."},
-                    {"status_code": 500, "message": "An error occurred while searching the database."}
-                ],
-                "example": "GET /search_in_database/example_db?search_param=item_key&passcode=pass123"
-            },
-            {
-                "endpoint": "/delete_from_database/<string:database>/<string:key>",
-                "methods": ["DELETE"],
-                "description": "Deletes specific data within a database based on the given database name and data key.",
-                "parameters": [
-                    {"name": "database", "type": "string", "description": "The name of the database."},
-                    {"name": "key", "type": "string", "description": "The key of the data to delete."},
-                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
-                ],
-                "response": [
-                    {"status_code": 200, "message": "Data deleted successfully."},
-                    {"status_code": 404, "message": "Database or data key not found."},
-                    {"status_code": 500, "message": "An error occurred while deleting the data."}
-                ],
-                "example": "DELETE /delete_from_database/example_db/item_key?passcode=pass123"
-            },
-            {
-                "endpoint": "/edit_in_database/<string:database>/<string:key>",
-                "methods": ["PUT"],
-                "description": "Edits specific data within a database based on the given database name and data key.",
-                "parameters": [
-                    {"name": "database", "type": "string", "description": "The name of the database."},
-                    {"name": "key", "type": "string", "description": "The key of the data to edit."},
-                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
-                ],
-                "request_body": "JSON data with new values to update the existing data.",
-                "response": [
-                    {"status_code": 200, "message": "Data edited successfully."},
-                    {"status_code": 404, "message": "Database or data key not found."},
-                    {"status_code": 500, "message": "Expected a JSON object to be sent in the request body."}
-                ],
-                "example": "PUT /edit_in_database/example_db/item_key?passcode=pass123"
-            },
-            {
-                "endpoint": "/download_data/<string:name>",
-                "methods": ["GET"],
-                "description": "Downloads the data of a specific database.",
-                "parameters": [
-                    {"name": "name", "type": "string", "description": "The name of the database to download."},
-                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
-                ],
-                "response": [
-                    {"status_code": 200, "message": "JSON response containing the database data."},
-                    {"status_code": 404, "message": "Database not found."}
-                ],
-                "example": "GET /download_data/example_db?passcode=pass123"
-            },
-            {
-                "endpoint": "/backup",
-                "methods": ["POST"],
-                "description": "Trigger data backup.",
-                "parameters": [],
-                "response": [
-                    {"status_code": 200, "message": "Data backup completed successfully."}
-                ],
-                "example": "POST /backup"
-            },
-            {
-                "endpoint": "/query_data",
-                "methods": ["GET"],
-                "description": "Query data in a specific database.",
-                "parameters": [
-                    {"name": "database_name", "type": "string", "description": "The name of the database to query."},
-                    {"name": "search_param", "type": "string", "description": "The search parameter to filter data."},
-                    {"name": "passcode", "type": "string", "description": "The passcode of the database."}
-                ],
-                "response": [
-                    {"status_code": 200, "message": "JSON response containing queried data."},
-                    {"status_code": 404, "message": "Database not found."},
-                    {"status_code": 500, "message": "An error occurred while querying the data."}
-                ],
-                "example": "GET /query_data?database_name=example_db&search_param=item_key&passcode=pass123"
-            },
-            {
-                "endpoint": "/health",
-                "methods": ["GET"],
-                "description": "Check the health and status of the API.",
-                "parameters": [],
-                "response": [
-                    {"status_code": 200, "message": "API is running and healthy."},
-                    {"status_code": 500, "message": "API is not running as expected."}
-                ],
-                "example": "GET /health"
-            }
-        ]
-    }
-    saveData()
-    return jsonify(api_documentation)
+    Retrieves data from a specified database based on the provided search parameter.
+    
+    Parameters:
+        None
+    
+    Returns:
+        - If the 'database_name' parameter is not found in the data dictionary, returns a JSON response with a message of 'Database not found.' and a status code of 404.
+        - If the 'search_param' parameter is provided, returns a JSON response with the query results containing all key-value pairs from the specified database that match the search parameter. If no matches are found, an empty dictionary is returned.
+        - If the 'search_param' parameter is not provided, returns a JSON response with all key-value pairs from the specified database.
+        - If any exception occurs during the execution of the function, returns a JSON response with an error message and a status code of 500.
+    """
+    try:
+        database_name = request.args.get('database_name')
+
+        # Validate the name parameter
+        valid, response, status_code = validateName(database_name)
+        if not valid:
+          return response, status_code
+          
+        search_param = request.args.get('search_param')
+        
+        if database_name not in data:
+            return jsonResponse({'message': 'Database not found.'}), 404
+        
+        if search_param:
+            passcode = request.args.get('passcode')
 
+            # Validate the passcode
+            valid, response, status_code = validatePasscode(database_name, passcode, write=False)
+            if not valid:
+              return response, status_code
 
+            # Search for data in the specified database based on the search parameter
+            adjustStats(database_name, reads=1)
+            query_result = {}
+            with data_lock:
+                entries = dict(data[database_name])
+            for key, value in entries.items():
+                if search_param.lower() in key.lower() or search_param.lower() in str(loadValue(database_name, key, value)).lower():
+                    query_result[key] = value
+            return databaseResponse(database_name, query_result)
+        else:
+            adjustStats(database_name, reads=1)
+            # Return all data in the specified database
+            return databaseResponse(database_name)
+    except Exception as e:
+        return jsonResponse({'message': f'An error occurred: {str(e)}'}), 500
 
 
 
-@app.route('/health', methods=['GET'])
-def health():
+
+
+
+# Function to save data to a JSON file
+def save_data_to_file():
     """
-    Check the health and status of the API.
+    Saves a snapshot of the data to a file named 'data_backup.json'.
+
+    Parameters:
+        None
 
     Returns:
-        JSON response indicating whether the API is healthy.
+        None
     """
-    # Check if your API has any specific health checks to perform.
-    # You can include additional checks based on your application's needs.
+    snapshot = takeSnapshot()
+    writeFileAtomically('data_backup.json', encodeSnapshotData(snapshot))
 
-    # For this example, we'll assume the API is healthy if it's running.
-    # You can customize this logic based on your application's requirements.
-    is_healthy = True
 
-    # Define the response based on the health status.
-    if is_healthy:
-        response = {
-            'status': 'healthy',
-            'message': 'API is running and healthy.'
-        }
-        status_code = 200
-    else:
-        response = {
-            'status': 'unhealthy',
-            'message': 'API is not running as expected.'
-        }
-        status_code = 500
+
+
+
+
+# Create an endpoint to trigger data backup
+@app.route('/backup', methods=['POST'])
+def backup_data():
+    """
+    Endpoint for backing up data.
+
+    This function is called when a POST request is made to the '/backup' route. It saves the data to a file and returns a JSON response with a success message.
+
+    Parameters:
+    None
+
+    Returns:
+    A tuple containing a JSON response and an HTTP status code. The JSON response contains a message indicating the success of the backup operation.
+    """
+    save_data_to_file()
     saveData()
-    return jsonify(response), status_code
+    return jsonResponse({'message': 'Data backup completed successfully.'}), 200
 
 
 
 
 
-def validateName(name):
+
+def saveData():
   """
-  Validate the provided database name.
+  Save data to a JSON file.
+
+  This function takes no parameters and does not return anything. It collects
+  the keys and databases changed since the previous save and hands them to a
+  background writer, which appends them to the log in the storage directory.
+  Changes waiting to be written are merged, so bursts of calls collapse into a
+  single write. Nothing is queued when no key or database changed; read counts
+  are written along with the next change.
 
   Parameters:
-      name (str): The name of the database to validate.
+    None
 
   Returns:
-      tuple: A boolean indicating validity, a JSON response, and an HTTP status code.
+    None
   """
+  global pending_changes
+  global pending_since
+  started = time.perf_counter()
+  # Queue the changes while still holding the lock, so they are merged in the order they were made
+  with data_lock:
+    if not dirty_keys and not dirty_databases:
+      return
+    changes = takeChanges()
+    with snapshot_condition:
+      if pending_changes is None:
+        pending_since = time.time()
+        pending_changes = changes
+      else:
+        mergeChanges(pending_changes, changes)
+      snapshot_condition.notify_all()
+  observeMetric('opensource_db_save_snapshot_seconds', time.perf_counter() - started)
 
-  if len(name) < 4 or len(name) > 25:
-    return False, jsonify({'message': 'Database name must be between 4 and 25 characters.'}), 400
+  # Print a message to console
+  print("[SERVER] SAVED DATA ON METHOD CALL!")
 
-  if not str(name[0]).isalpha():
-    return False, json({"message": "Database name must start with a letter."}), 400
 
-  if str(name[-1] ) == '_':
-    return False, jsonify({'message': 'Database name cannot end with an underscore.'}), 400
-  
-  # Check if the name contains only valid characters
-  valid_grammar = set('abcdefghijklmnopqrstuvwxyz0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_')
 
-  if not set(name).issubset(valid_grammar):
-    return False, jsonify({'message': 'Database name contains invalid characters.'}), 400
 
-  return True, jsonify({'message': 'Database name is valid'}), 201
 
-  
+
+def markDirty(name, key=None, reset=False):
+  """
+  Remember that a key or a database changed, so the next save writes it.
+
+  Must be called while holding data_lock.
+
+  Parameters:
+    name (str): The name of the database.
+    key (str): The key that was set or deleted, or None if the database itself changed.
+    reset (bool): Whether the database was created or deleted, so it is written again as a whole.
+
+  Returns:
+    None
+  """
+  if reset:
+    dirty_keys.pop(name, None)
+    dirty_databases[name] = True
+  elif key is None:
+    dirty_databases.setdefault(name, False)
+  elif dirty_databases.get(name) is not True:
+    dirty_keys.setdefault(name, set()).add(key)
+
+
 
 
 
-def validatePasscode(passcode):
+
+def takeChanges():
   """
-  Validate the provided passcode for a database.
+  Collect the keys and databases changed since the last save.
+
+  Only the changed keys are copied while the lock is held. Handlers always replace
+  stored values instead of mutating them, so the values themselves are shared with
+  the live data. A deleted key is collected as NO_VALUE.
 
   Parameters:
-      passcode (str): The passcode to validate.
+    None
 
   Returns:
-      tuple: A boolean indicating validity, a JSON response, and an HTTP status code.
+    dict: The changes by database name under 'databases', and the statistics of every database under 'stats'.
   """
-  # Check if the passcode is given
-  if not passcode:
-    saveData()
-    return False, jsonify({'message': 'Passcode for the database not provided. Provide a passcode as the parameter'}), 400
-  
-  # Check if the passcode is valid
-  if not (encryptPasscode(passcode) == passcodes[name]['passcode']):
-    saveData()
-    return False, jsonify({'message': 'Invalid passcode for the database.'}), 400
+  global dirty_keys
+  global dirty_databases
+  with data_lock:
+    keys, databases = dirty_keys, dirty_databases
+    dirty_keys, dirty_databases = {}, {}
+    changes = {}
+    for name, reset in databases.items():
+      change = changes[name] = {'reset': reset, 'exists': name in data, 'passcode': passcodes.get(name), 'entries': {}, 'versions': {}}
+      if reset and name in data:
+        change['entries'] = dict(data[name])
+        change['versions'] = dict(versions.get(name, {}))
+    for name, changed in keys.items():
+      change = changes.setdefault(name, {'reset': False, 'exists': name in data, 'entries': {}, 'versions': {}})
+      entries = data.get(name, {})
+      key_versions = versions.get(name, {})
+      for key in changed:
+        change['entries'][key] = entries.get(key, NO_VALUE)
+        if key in key_versions:
+          change['versions'][key] = key_versions[key]
+    return {'databases': changes, 'stats': copyStats()}
 
-  return True, jsonify({'message': 'Valid passcode!.'}), 201
 
 
 
 
 
-@app.route('/create_database', methods=['POST'])
-def create_database():
-    """
-    Create a new database with the specified name.
+def mergeChanges(pending, changes):
+  """
+  Merge newer changes into changes that are still waiting to be written.
 
-    Parameters:
-        None (expects 'name' in the query parameters).
+  Parameters:
+    pending (dict): Changes returned by takeChanges(), updated in place.
+    changes (dict): Newer changes returned by takeChanges().
 
-    Returns:
-        JSON response with success or error message.
-    """
-    try:
-        # Get the name parameter from the request
-        name = request.args.get('name')
+  Returns:
+    None
+  """
+  for name, change in changes['databases'].items():
+    current = pending['databases'].get(name)
+    if current is None or change['reset']:
+      pending['databases'][name] = change
+      continue
+    current['exists'] = change['exists']
+    current['entries'].update(change['entries'])
+    current['versions'].update(change['versions'])
+    if 'passcode' in change:
+      current['passcode'] = change['passcode']
+  pending['stats'] = changes['stats']
 
-        # Check if name is given
-        if not name:
-          return jsonify({'message': 'Expected a name as an argument.'}), 400
 
-        # Validate the name parameter
-        valid, response, status_code = validateName(name)
-        if not valid:
-          return response, status_code
 
 
-        # Check if a database with the same name already exists
-        if name in data:
-            return jsonify({'message': 'Database with this name already exists.'}), 400
 
-        # Create a new database with an empty dictionary
-        data[name] = {}
-        passcode = generatePasscode()
-        passcodes[name] = {'passcode': encryptPasscode(passcode), 'created_at': time.time()}
 
-        saveData()
-    
-        return jsonify({
-          'message': 'Database created successfully.',
-          'passcode': passcode,
-          'created_at': time.time()
-        }), 201
-    except:
-        saveData()
-        return jsonify({'message': 'Expected a name as an argument.'}), 400
+def takeSnapshot():
+  """
+  Capture a consistent point-in-time copy of the data, passcodes, versions and statistics.
 
+  Handlers always replace stored values instead of mutating them, so copying the
+  dictionaries that map names and keys is enough; the values themselves are shared
+  with the live data and never serialized while the lock is held. This copies every
+  key, so saves use takeChanges() instead.
 
+  Parameters:
+    None
 
+  Returns:
+    A dictionary with the 'data', 'passcodes', 'versions' and 'stats' snapshots.
+  """
+  with data_lock:
+    return {
+      'data': {name: dict(entries) for name, entries in data.items()},
+      'passcodes': dict(passcodes),
+      'versions': {name: dict(entries) for name, entries in versions.items()},
+      'stats': copyStats()
+    }
 
 
-@app.route('/add_to_database/<string:name>', methods=['POST'])
-def add_to_database(name):
-    """
-    Add data to a specified database.
 
-    Parameters:
-        name (str): The name of the database.
 
-    Returns:
-        JSON response with success or error message.
-    """
+
+
+def writeChanges(changes):
+  """
+  Append saved changes to the log.
+
+  The log segment is flushed to disk before returning. Once it grows past the
+  segment size it is sealed, and once the sealed segments outgrow the latest
+  snapshot segment the compactor is asked to write a new one. If an append fails,
+  nothing more is appended until repairLog() succeeds.
+
+  Parameters:
+    changes (dict): Changes returned by takeChanges().
+
+  Returns:
+    int: The number of bytes written.
+  """
+  global log_bytes
+  global sealed_bytes
+  global log_damaged
+  content = b''.join(applyChanges(persisted_state, changes))
+  if log_damaged:
+    # The snapshot written by the repair holds these changes as well
+    return repairLog()
+  if content:
     try:
-      # Validate the name parameter
-      valid, response, status_code = validateName(name)
-      if not valid:
-        return response, status_code
+      log_file.write(content)
+      log_file.flush()
+      if app.config['FSYNC']:
+        os.fsync(log_file.fileno())
+    except Exception:
+      # Part of the records may be on disk, while the written state already counts all of them
+      with snapshot_condition:
+        log_damaged = True
+      raise
+    log_bytes += len(content)
 
-      # Get the name parameter from the request
-      if not (name in data):
-        saveData()
-        return jsonify({'message': 'Database not found.'}), 404
+  if log_bytes >= app.config['SEGMENT_BYTES']:
+    sealed_bytes += log_bytes
+    through = rollLogSegment()
+    with compaction_condition:
+      threshold = max(app.config['SEGMENT_BYTES'], last_snapshot_bytes)
+    if sealed_bytes >= threshold:
+      requestCompaction(copyState(persisted_state), through)
+      sealed_bytes = 0
+  setMetric('opensource_db_storage_bytes', log_bytes + sealed_bytes, kind='log')
+  return len(content)
 
 
-      passcode = request.args.get('passcode')
 
-      # Validate the passcode
-      valid, response, status_code = validatePasscode(passcode)
-      if not valid:
-        return response, status_code
 
 
-      # Assuming JSON data is sent in the request body
-      data_to_add = request.json
-      
 
-      # Get the name parameter from the request
-      key = request.args.get('key')
-      
-      
-      if key:
-        data[name][str(key)] = data_to_add
-        saveData()
-        return jsonify({'message': 'Data added to Database successfully.'}), 201
-      else:
-        saveData()
-        return jsonify({'message': 'Data key not found in the database.'}), 404
-          
-    except:
-      saveData()
-      return jsonify({'message': 'Expected a JSON object and a parameter termed "name" to be sent in the request body.'}), 400
+def repairLog():
+  """
+  Repair the log after a failed append.
 
+  The partial records are cut off the open log segment, which is then sealed,
+  and a snapshot of the written state is taken through it, so the changes lost
+  with the failed append are on disk again. If the snapshot fails, the next call
+  only retries the snapshot.
 
+  Parameters:
+    None
 
+  Returns:
+    int: The size of the snapshot segment in bytes.
+  """
+  global log_damaged
+  global repair_through
+  global sealed_bytes
+  if repair_through is None:
+    # Closing may write buffered bytes of the failed append, which the truncation removes again
+    try:
+      log_file.close()
+    except OSError:
+      pass
+    with open(segmentPath(app.config['STORAGE_DIR'], 'log', log_sequence), 'r+b') as segment:
+      segment.truncate(log_bytes)
+      if app.config['FSYNC']:
+        os.fsync(segment.fileno())
+    sealed_bytes += log_bytes
+    repair_through = rollLogSegment()
 
+  requestCompaction(copyState(persisted_state), repair_through)
+  with compaction_condition:
+    compaction_condition.wait_for(lambda: pending_compaction is None and not compacting)
+    if last_compaction_error is not None:
+      raise OSError('Could not write the snapshot repairing the log: ' + last_compaction_error)
+    written = last_snapshot_bytes
+  print('[SERVER] REPAIRED THE LOG AFTER A FAILED WRITE')
+  sealed_bytes = 0
+  repair_through = None
+  with snapshot_condition:
+    log_damaged = False
+  setMetric('opensource_db_storage_bytes', log_bytes + sealed_bytes, kind='log')
+  return written
 
 
-@app.route('/view_database/<string:name>', methods=['GET'])
-def view_database(name):
-    """
-    Retrieve the contents of a specific database.
 
-    Parameters:
-        name (str): The name of the database.
 
-    Returns:
-        JSON response containing the database contents or an error message.
-    """
-    # Validate the name parameter
-    valid, response, status_code = validateName(name)
-    if not valid:
-      return response, status_code
 
-    # Check if the database exists in the 'data' dictionary
-    if name in data:
-      passcode = request.args.get('passcode')
 
-      # Validate the passcode
-      valid, response, status_code = validatePasscode(passcode)
-      if not valid:
-        return response, status_code
+def applyChanges(state, changes):
+  """
+  Apply saved changes to the state already written, and encode them as log records.
 
-      # Return the corresponding database entry as a JSON response
-      saveData()
-      return jsonify(data[name])
-    else:
-        # Return a JSON response with a 'message' key set to 'Database not found.' and a status code of 404
-        saveData()
-        return jsonify({'message': 'Database not found.'}), 404
-    
+  The cached encodings of deleted keys are dropped along the way.
+
+  Parameters:
+    state (dict): The 'data', 'passcodes', 'versions' and 'stats' already written, updated in place.
+    changes (dict): Changes returned by takeChanges().
+
+  Returns:
+    list: The encoded records, one per database that changed.
+  """
+  records = []
+  for name, change in changes['databases'].items():
+    if change['reset'] and (name in state['data'] or name in state['passcodes']):
+      records.append(encodeRecord('drop', name=encodeJSON(name)))
+      for part in ('data', 'passcodes', 'versions', 'stats'):
+        state[part].pop(name, None)
+      encoded_values.pop(name, None)
+    if not change['exists']:
+      continue
+
+    fields = {}
+    if 'passcode' in change and change['passcode'] != state['passcodes'].get(name):
+      state['passcodes'][name] = change['passcode']
+      fields['passcode'] = encodeJSON(change['passcode'])
+
+    entries = state['data'].setdefault(name, {})
+    put = {key: value for key, value in change['entries'].items() if value is not NO_VALUE}
+    entries.update(put)
+    deleted = [key for key, value in change['entries'].items() if value is NO_VALUE and key in entries]
+    cached = encoded_values.get(name, {})
+    for key in deleted:
+      del entries[key]
+      cached.pop(key, None)
+    if change['versions']:
+      state['versions'].setdefault(name, {}).update(change['versions'])
+
+    stats = changes['stats'].get(name)
+    if stats is not None and stats != state['stats'].get(name):
+      state['stats'][name] = stats
+      fields['stats'] = encodeJSON(stats)
+    if put or deleted or change['versions'] or fields or change['reset']:
+      records.extend(encodeUpdateRecords(name, fields, put, deleted, change['versions']))
+
+  # Read counts change without any write, so statistics are compared for every database
+  for name, stats in changes['stats'].items():
+    if name in state['data'] and name not in changes['databases'] and stats != state['stats'].get(name):
+      state['stats'][name] = stats
+      records.append(encodeRecord('update', name=encodeJSON(name), stats=encodeJSON(stats)))
+  return records
+
+
+
+
+
+
+def encodeUpdateRecords(name, fields, put, deleted, versions):
+  """
+  Encode an update record, split so no record holds more than MAX_RECORD_KEYS keys.
+
+  The keys put, deleted and versioned fill the records in turn. Every record but
+  the last is marked "more", and readSegment() only returns a group once its last
+  record was read, so a change is recovered whole or not at all.
+
+  Parameters:
+    name (str): The name of the database.
+    fields (dict): The fields that are not split, already encoded as JSON. They go in the last record.
+    put (dict): The keys and values to put.
+    deleted (list): The keys to delete.
+    versions (dict): The versions of the keys.
+
+  Returns:
+    list: The encoded records.
+  """
+  records = []
+  current = {}
+  room = MAX_RECORD_KEYS
+  for field, items in (('put', list(put.items())), ('delete', list(deleted)), ('versions', list(versions.items()))):
+    start = 0
+    while start < len(items):
+      if room == 0:
+        records.append(encodeRecord('update', name=encodeJSON(name), more=b'true', **current))
+        current = {}
+        room = MAX_RECORD_KEYS
+      chunk = items[start:start + room]
+      start += len(chunk)
+      room -= len(chunk)
+      if field == 'put':
+        current[field] = encodeDatabase(name, dict(chunk))
+      elif field == 'delete':
+        current[field] = encodeJSON(chunk)
+      else:
+        current[field] = encodeJSON(dict(chunk))
+  current.update(fields)
+  records.append(encodeRecord('update', name=encodeJSON(name), **current))
+  return records
+
+
+
+
+
+
+def copyState(state):
+  """
+  Copy the state written by the background writer, so the compactor can encode it while the writer moves on.
+
+  Parameters:
+    state (dict): The 'data', 'passcodes', 'versions' and 'stats' to copy.
+
+  Returns:
+    dict: A copy sharing the stored values.
+  """
+  return {
+    'data': {name: dict(entries) for name, entries in state['data'].items()},
+    'passcodes': dict(state['passcodes']),
+    'versions': {name: dict(entries) for name, entries in state['versions'].items()},
+    'stats': dict(state['stats'])
+  }
 
 
 
 
 
-@app.route('/delete_database/<string:name>', methods=['DELETE'])
-def delete_database(name):
-    """
-    Deletes a specific database entry based on the given name.
 
-    Parameters:
-        name (str): The name of the database to delete.
+def encodeSnapshotSegment(snapshot, through):
+  """
+  Encode a whole snapshot as a snapshot segment.
 
-    Returns:
-        If the database exists, returns a JSON response with a 'message' key set to 'Database deleted successfully.' and a status code of 200.
-        If the database does not exist, returns a JSON response with a 'message' key set to 'Database not found.' and a status code of 404.
-    """
-  
-    # Validate the name parameter
-    valid, response, status_code = validateName(name)
-    if not valid:
-      return response, status_code
+  A snapshot segment holds one update record per database, with only its current
+  keys and split like log records when it has many of them, followed by an end record naming the last log segment it covers. A segment
+  without its end record was not written completely and is ignored by recovery.
 
-    # Check if the database exists in the 'data' dictionary
-    if name in data:
-        passcode = request.args.get('passcode')
+  Parameters:
+    snapshot (dict): A snapshot returned by takeSnapshot() or copyState().
+    through (int): The sequence number of the last log segment the snapshot covers.
 
-        # Validate the passcode
-        valid, response, status_code = validatePasscode(passcode)
-        if not valid:
-          return response, status_code
+  Returns:
+    bytes: The segment.
+  """
+  records = []
+  names = snapshot['passcodes'].keys() | snapshot['data'].keys()
+  for name in names:
+    fields = {}
+    if name in snapshot['passcodes']:
+      fields['passcode'] = encodeJSON(snapshot['passcodes'][name])
+    if name in snapshot['stats']:
+      fields['stats'] = encodeJSON(snapshot['stats'][name])
+    records.extend(encodeUpdateRecords(name, fields, snapshot['data'].get(name, {}), (), snapshot['versions'].get(name, {})))
+  records.append(encodeRecord('end', databases=encodeJSON(len(names)), through=encodeJSON(through)))
+  return b''.join(records)
 
-        # Delete the corresponding database entry
-        del data[name]
-        # Return a JSON response with a 'message' key set to 'Database deleted successfully.' and a status code of 200
-        saveData()
-        return jsonify({'message': 'Database deleted successfully.'}), 200
-    else:
-        # Return a JSON response with a 'message' key set to 'Database not found.' and a status code of 404
-        saveData()
-        return jsonify({'message': 'Database not found.'}), 404
-    
 
 
 
 
 
 
-@app.route('/search_in_database/<string:name>', methods=['GET'])
-def search_in_database(name):
-    """
-    Searches for data within a specific database based on the given name.
+def rollLogSegment():
+  """
+  Seal the current log segment and start the next one.
 
-    Parameters:
-        name (str): The name of the database to search within.
+  Parameters:
+    None
 
-    Returns:
-        If the database exists, returns a JSON response containing the data matching the search criteria.
-        If the database does not exist or the search parameter is not found, returns a JSON response with a 'message' key set to 'Database or search parameter not found.' and a status code of 404.
-    """
-    try:
-  
-        # Validate the name parameter
-        valid, response, status_code = validateName(name)
-        if not valid:
-          return response, status_code
+  Returns:
+    int: The sequence number of the sealed segment.
+  """
+  global log_file
+  global log_sequence
+  global log_bytes
+  log_file.close()
+  log_sequence += 1
+  log_file = open(segmentPath(app.config['STORAGE_DIR'], 'log', log_sequence), 'ab')
+  log_bytes = 0
+  syncDirectory(app.config['STORAGE_DIR'])
+  return log_sequence - 1
 
-        if name in data:
-          passcode = request.args.get('passcode')
 
-          # Validate the passcode
-          valid, response, status_code = validatePasscode(passcode)
-          if not valid:
-            return response, status_code
 
-          search_param = request.args.get('search_param')
 
-          # Check if the search parameter exists in the database
-          if search_param in data[name]:
-              saveData()
-              # Return the matching data as a JSON response
-              return jsonify(data[name][search_param])
-          else:
-              saveData()
-              return jsonify({'message': 'Search parameter not found in the database.'}), 404
-        else:
-            saveData()
-            return jsonify({'message': 'Database not found.'}), 404
-    except:
-        saveData()
-        return jsonify({'message': 'An error occurred while searching the database.'}), 500
-    
 
 
+def requestCompaction(snapshot, through):
+  """
+  Hand a sealed state to the compactor, replacing any state it has not started on yet.
 
+  Parameters:
+    snapshot (dict): The snapshot matching the end of the sealed log segments.
+    through (int): The sequence number of the last sealed log segment.
 
+  Returns:
+    None
+  """
+  global pending_compaction
+  with compaction_condition:
+    pending_compaction = (snapshot, through)
+    compaction_condition.notify_all()
 
 
-@app.route('/delete_from_database/<string:database>/<string:key>', methods=['DELETE'])
-def delete_from_database(database, key):
-    """
-    Deletes specific data within a database based on the given database name and data key.
 
-    Parameters:
-        database (str): The name of the database.
-        key (str): The key of the data to delete.
 
-    Returns:
-        If the database and data key exist, deletes the data and returns a JSON response with a 'message' key set to 'Data deleted successfully.' and a status code of 200.
-        If the database or data key do not exist, returns a JSON response with a 'message' key set to 'Database or data key not found.' and a status code of 404.
-    """
-    try:
-        # Validate the name parameter
-        valid, response, status_code = validateName(database)
-        if not valid:
-          return response, status_code
 
-        if database in data:
-            passcode = request.args.get('passcode')
 
-            # Validate the passcode
-            valid, response, status_code = validatePasscode(passcode)
-            if not valid:
-              return response, status_code
+def compactor():
+  """
+  Background loop merging sealed log segments into a new snapshot segment.
 
-            if key in data[database]:
-                del data[database][key]
-                saveData()
-                return jsonify({'message': 'Data deleted successfully.'}), 200
-            else:
-                saveData()
-                return jsonify({'message': 'Data key not found in the database.'}), 404
-        else:
-            saveData()
-            return jsonify({'message': 'Database not found.'}), 404
+  The snapshot only holds the current keys of every database, so deleted and
+  overwritten records are dropped, and the segments it replaces are removed.
+
+  Parameters:
+    None
+
+  Returns:
+    None
+  """
+  global pending_compaction
+  global compacting
+  global last_snapshot_bytes
+  global last_compaction_error
+  while True:
+    with compaction_condition:
+      while pending_compaction is None:
+        compaction_condition.wait()
+      snapshot, through = pending_compaction
+      pending_compaction = None
+      compacting = True
+
+    started = time.perf_counter()
+    try:
+      written = writeSnapshotSegment(snapshot, through)
+      observeMetric('opensource_db_compaction_seconds', time.perf_counter() - started)
+      incrementMetric('opensource_db_compactions_total', outcome='success')
+      with compaction_condition:
+        last_snapshot_bytes = written
+        last_compaction_error = None
     except Exception as e:
-        saveData()
-        print("Exception:-", e)
-        return jsonify({'message': 'An error occurred while deleting the data.'}), 500
-      
-    
+      incrementMetric('opensource_db_compactions_total', outcome='failure')
+      print("[SERVER] FAILED TO COMPACT DATA:", e)
+      with compaction_condition:
+        last_compaction_error = str(e)
+    finally:
+      with compaction_condition:
+        compacting = False
+        compaction_condition.notify_all()
 
 
 
 
 
-@app.route('/edit_in_database/<string:database>/<string:key>', methods=['PUT'])
-def edit_in_database(database, key):
-    """
-    Edits specific data within a database based on the given database name and data key.
 
-    Parameters:
-        database (str): The name of the database.
-        key (str): The key of the data to edit.
+def writeSnapshotSegment(snapshot, through):
+  """
+  Write a snapshot segment, then remove the segments no longer needed for recovery.
 
-    Returns:
-        If the database and data key exist, edits the data with new values provided in the request body
-        and returns a JSON response with a 'message' key set to 'Data edited successfully.' and a status code of 200.
-        If the database or data key do not exist, returns a JSON response with a 'message' key set to 'Database or data key not found.' and a status code of 404.
-    """
-    try:
-        # Validate the name parameter
-        valid, response, status_code = validateName(database)
-        if not valid:
-          return response, status_code
+  The newest KEEP_SNAPSHOTS snapshot segments are kept, along with every log
+  segment written after the oldest of them.
 
-        if database in data:
-            passcode = request.args.get('passcode')
+  Parameters:
+    snapshot (dict): A snapshot returned by takeSnapshot().
+    through (int): The sequence number of the last log segment the snapshot covers.
 
-            # Validate the passcode
-            valid, response, status_code = validatePasscode(passcode)
-            if not valid:
-              return response, status_code
+  Returns:
+    int: The size of the snapshot segment in bytes.
+  """
+  directory = app.config['STORAGE_DIR']
+  written = writeFileAtomically(segmentPath(directory, 'snapshot', through), encodeSnapshotSegment(snapshot, through))
 
-            key = str(key)
-            if key in data[database]:
-                new_data = request.json  # Assuming JSON data with new values is sent in the request body
-                data[database][key] = new_data
-                saveData()
-                return jsonify({'message': 'Data edited successfully.'}), 200
-            else:
-                saveData()
-                return jsonify({'message': 'Data key not found in the database.'}), 404
-        else:
-            saveData()
-            return jsonify({'message': 'Database not found.'}), 404
-    except:
-        saveData()
-        return jsonify({'message': 'Expected a JSON object to be sent in the request body.'}), 500
-    
+  snapshots, logs = listSegments(directory)
+  kept = sorted(snapshots, reverse=True)[:KEEP_SNAPSHOTS]
+  for sequence, path in snapshots.items():
+    if sequence not in kept:
+      os.remove(path)
+  for sequence, path in logs.items():
+    if sequence <= kept[-1]:
+      os.remove(path)
+  syncDirectory(directory)
+  setMetric('opensource_db_storage_bytes', sum(os.path.getsize(snapshots[sequence]) for sequence in kept), kind='snapshot')
+  return written
 
 
 
 
 
 
-@app.route('/download_data/<string:name>', methods=['GET'])
-def download_data(name):
-    # Validate the name parameter
-    valid, response, status_code = validateName(name)
-    if not valid:
-      return response, status_code
+def openStorage(recovery):
+  """
+  Prepare the storage directory for writing after the data was recovered.
 
-    # Check if the database exists in the 'data' dictionary
-    if name in data:
-      passcode = request.args.get('passcode')
+  When there was no snapshot segment yet, or the log ended with a torn record or
+  a gap, a snapshot of the recovered data is written first so the damaged segments
+  are never replayed again. Damaged snapshot segments are renamed out of the way
+  and a torn log tail is truncated. Writing then continues in the last log segment
+  if it ended cleanly, or in a new one.
 
-      # Validate the passcode
-      valid, response, status_code = validatePasscode(passcode)
-      if not valid:
-        return response, status_code
+  Parameters:
+    recovery (dict): The result of recoverStorage(), or of reading the files of earlier versions.
 
+  Returns:
+    None
+  """
+  global log_file
+  global log_sequence
+  global log_bytes
+  global sealed_bytes
+  global persisted_state
+  global last_snapshot_bytes
+  directory = app.config['STORAGE_DIR']
+  os.makedirs(directory, exist_ok=True)
+  for filename in os.listdir(directory):
+    if filename.startswith('.') and filename.endswith('.tmp'):
+      os.remove(os.path.join(directory, filename))
+  for path in recovery['damaged']:
+    print('[SERVER] IGNORING DAMAGED SNAPSHOT:', path)
+    os.replace(path, path + '.damaged')
+  if recovery['torn'] is not None:
+    # Cut the torn tail off, so replaying from an older snapshot still reaches the segments after it
+    path, valid = recovery['torn']
+    print('[SERVER] TRUNCATING TORN LOG SEGMENT:', path)
+    with open(path, 'r+b') as segment:
+      segment.truncate(valid)
+      if app.config['FSYNC']:
+        os.fsync(segment.fileno())
+
+  snapshot = takeSnapshot()
+  sequence = recovery['sequence']
+  snapshots, logs = listSegments(directory)
+  if not recovery['clean']:
+    last_snapshot_bytes = writeSnapshotSegment(snapshot, sequence)
+    log_sequence = sequence + 1
+    log_bytes = 0
+  elif sequence in logs:
+    # Keep appending to the last log segment, which ended cleanly
+    last_snapshot_bytes = os.path.getsize(snapshots[max(snapshots)])
+    log_sequence = sequence
+    log_bytes = os.path.getsize(logs[sequence])
+  else:
+    last_snapshot_bytes = os.path.getsize(snapshots[max(snapshots)])
+    log_sequence = sequence + 1
+    log_bytes = 0
+  sealed_bytes = recovery['log_bytes'] - log_bytes if recovery['clean'] else 0
+
+  log_file = open(segmentPath(directory, 'log', log_sequence), 'ab')
+  syncDirectory(directory)
+  persisted_state = snapshot
+  snapshots, _ = listSegments(directory)
+  setMetric('opensource_db_storage_bytes', sum(os.path.getsize(path) for path in snapshots.values()), kind='snapshot')
+  setMetric('opensource_db_storage_bytes', log_bytes + sealed_bytes, kind='log')
+
+
+
+
+
+
+def encodeSnapshotData(snapshot):
+  """
+  Serialize the data of a snapshot, reusing the cached bytes of unchanged values.
 
-      # Return the corresponding database entry as a JSON response
-      saveData()
-      return jsonify(data[name])
-    else:
-        # Return a JSON response with a 'message' key set to 'Database not found.' and a status code of 404
-        saveData()
-        return jsonify({'message': 'Database not found.'}), 404
+  The cache is rebuilt from the snapshot, so values that were deleted or
+  overwritten since the previous save are dropped from it.
 
+  Parameters:
+    snapshot (dict): A snapshot returned by takeSnapshot().
 
+  Returns:
+    bytes: The data as a JSON object.
+  """
+  global encoded_values
+  cache = {}
+  parts = [encodeJSON(name) + b':' + encodeDatabase(name, entries, cache) for name, entries in snapshot['data'].items()]
+  encoded_values = cache
+  return b'{' + b','.join(parts) + b'}'
 
 
 
 
 
-@app.route('/query_data', methods=['GET'])
-def query_data():
-    """
-    Retrieves data from a specified database based on the provided search parameter.
-    
-    Parameters:
-        None
-    
-    Returns:
-        - If the 'database_name' parameter is not found in the data dictionary, returns a JSON response with a message of 'Database not found.' and a status code of 404.
-        - If the 'search_param' parameter is provided, returns a JSON response with the query results containing all key-value pairs from the specified database that match the search parameter. If no matches are found, an empty dictionary is returned.
-        - If the 'search_param' parameter is not provided, returns a JSON response with all key-value pairs from the specified database.
-        - If any exception occurs during the execution of the function, returns a JSON response with an error message and a status code of 500.
-    """
-    try:
-        database_name = request.args.get('database_name')
 
-        # Validate the name parameter
-        valid, response, status_code = validateName(database_name)
-        if not valid:
-          return response, status_code
-          
-        search_param = request.args.get('search_param')
-        
-        if database_name not in data:
-            saveData()
-            return jsonify({'message': 'Database not found.'}), 404
-        
-        if search_param:
-            passcode = request.args.get('passcode')
+def writeFileAtomically(path, content):
+  """
+  Write a string to a file without ever leaving a partially written file behind.
 
-            # Validate the passcode
-            valid, response, status_code = validatePasscode(passcode)
-            if not valid:
-              return response, status_code
+  The content is written to a temporary file in the same directory and flushed
+  to disk, then the file atomically replaces the target.
 
-            # Search for data in the specified database based on the search parameter
-            query_result = {}
-            for key, value in data[database_name].items():
-                if search_param.lower() in key.lower() or search_param.lower() in str(value).lower():
-                    query_result[key] = value
-            saveData()
-            return jsonify(query_result)
-        else:
-            saveData()
-            # Return all data in the specified database
-            return jsonify(data[database_name])
-    except Exception as e:
-        saveData()
-        return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+  Parameters:
+    path (str): The path of the file to write.
+    content (bytes): The content to write.
 
+  Returns:
+    int: The number of bytes written.
+  """
+  directory = os.path.dirname(os.path.abspath(path))
+  descriptor, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+  try:
+    with os.fdopen(descriptor, 'wb') as outfile:
+      outfile.write(content)
+      written = outfile.tell()
+      outfile.flush()
+      if app.config['FSYNC']:
+        os.fsync(outfile.fileno())
+    os.replace(temp_path, path)
+    syncDirectory(directory)
+    return written
+  except:
+    if os.path.exists(temp_path):
+      os.remove(temp_path)
+    raise
 
 
 
 
 
-# Function to save data to a JSON file
-def save_data_to_file():
-    """
-    Saves the data to a file named 'data_backup.json'.
 
-    Parameters:
-        None
+def syncDirectory(directory):
+  """
+  Flush the entries of a directory to disk, so created and renamed files survive a crash.
 
-    Returns:
-        None
-    """
-    with open('data_backup.json', 'w') as file:
-        json.dump(data, file)
+  Does nothing on platforms that cannot open directories, such as Windows.
+
+  Parameters:
+    directory (str): The directory to flush.
 
+  Returns:
+    None
+  """
+  if not app.config['FSYNC'] or not hasattr(os, 'O_DIRECTORY'):
+    return
+  descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+  try:
+    os.fsync(descriptor)
+  finally:
+    os.close(descriptor)
 
 
 
 
 
-# Create an endpoint to trigger data backup
-@app.route('/backup', methods=['POST'])
-def backup_data():
-    """
-    Endpoint for backing up data.
 
-    This function is called when a POST request is made to the '/backup' route. It saves the data to a file and returns a JSON response with a success message.
+def snapshotWriter():
+  """
+  Background loop writing the pending changes to disk.
 
-    Parameters:
+  Parameters:
     None
 
-    Returns:
-    A tuple containing a JSON response and an HTTP status code. The JSON response contains a message indicating the success of the backup operation.
-    """
-    save_data_to_file()
-    saveData()
-    return jsonify({'message': 'Data backup completed successfully.'}), 200
+  Returns:
+    None
+  """
+  global pending_changes
+  global pending_since
+  global snapshot_writing
+  global last_save_time
+  global last_save_error
+  while True:
+    with snapshot_condition:
+      while pending_changes is None and not log_damaged:
+        snapshot_condition.wait()
+      if pending_changes is None:
+        # Nothing new to save, but a damaged log is repaired again after a pause
+        snapshot_condition.wait(LOG_REPAIR_RETRY_SECONDS)
+      changes = pending_changes or {'databases': {}, 'stats': {}}
+      pending_changes = None
+      pending_since = None
+      snapshot_writing = True
+
+    started = time.perf_counter()
+    try:
+      written = writeChanges(changes)
+      observeMetric('opensource_db_save_write_seconds', time.perf_counter() - started)
+      incrementMetric('opensource_db_save_bytes_total', written)
+      setMetric('opensource_db_last_save_bytes', written)
+      setMetric('opensource_db_last_save_timestamp_seconds', time.time())
+      with snapshot_condition:
+        last_save_time = time.time()
+        last_save_error = None
+    except Exception as e:
+      incrementMetric('opensource_db_save_failures_total')
+      print("[SERVER] FAILED TO SAVE DATA:", e)
+      with snapshot_condition:
+        last_save_error = str(e)
+    finally:
+      with snapshot_condition:
+        snapshot_writing = False
+        snapshot_condition.notify_all()
 
 
 
 
 
 
-def saveData():
+def flushData(timeout=None):
   """
-  Save data to a JSON file.
-
-  This function takes no parameters and does not return anything. It saves the
-  given data as a JSON object in a file named "database.json" in the current
-  directory.
+  Wait until every pending change and compaction has been written to disk.
 
   Parameters:
-    None
+    timeout (float): The maximum number of seconds to wait, or None to wait forever.
 
   Returns:
-    None
+    bool: True if everything was written, False if the timeout expired.
   """
-  global data
-  global passcodes
-  # Convert data to a JSON string with indentation
-  json_object = json.dumps(data, indent=4)
+  deadline = time.monotonic() + timeout if timeout is not None else None
+  with snapshot_condition:
+    if not snapshot_condition.wait_for(lambda: pending_changes is None and not snapshot_writing, timeout):
+      return False
+  remaining = max(deadline - time.monotonic(), 0) if deadline is not None else None
+  with compaction_condition:
+    return compaction_condition.wait_for(lambda: pending_compaction is None and not compacting, remaining)
+
+
+
 
-  # Convert passcodes to a JSON string with indentation
-  passcode_object = json.dumps(passcodes, indent=4)
 
-  # Print a message to console
-  print("[SERVER] SAVED DATA ON METHOD CALL!")
-  
-  # Open the file in write mode and write the JSON string to it
-  with open("database.json", "w") as outfile:
-    outfile.write(json_object)
 
-  # Open the file in write mode and write the JSON string to it 
-  with open("passcodes.json", "w") as outfile:
-    outfile.write(passcode_object)
+# Open the storage, start the background writer and compactor and make sure pending snapshots reach disk on exit
+openStorage(recovery)
+snapshot_thread = threading.Thread(target=snapshotWriter, name='snapshot-writer', daemon=True)
+snapshot_thread.start()
+compaction_thread = threading.Thread(target=compactor, name='compactor', daemon=True)
+compaction_thread.start()
+atexit.register(flushData)
 
 
 
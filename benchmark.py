@@ -0,0 +1,781 @@
+# Importing required Libraries
+import argparse
+import contextlib
+import http.client
+import importlib
+import itertools
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import threading
+import time
+
+
+
+
+
+# Name of the database every scenario runs against
+BENCH_DATABASE = 'benchdb'
+
+# Routes that are deliberately not benchmarked
+SKIPPED_ROUTES = {'/static/<path:filename>'}
+
+
+
+
+
+def parseArguments(argv=None):
+    """
+    Parse the command line arguments of the benchmark.
+
+    Parameters:
+        argv (list): The arguments to parse, or None to use sys.argv.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark every endpoint of OpenSource DB.')
+    parser.add_argument('--keys', type=int, default=1000, help='Number of keys in the synthetic database.')
+    parser.add_argument('--value-size', type=int, default=256, help='Approximate size in bytes of every value.')
+    parser.add_argument('--requests', type=int, default=200, help='Number of requests sent per scenario.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Number of concurrent clients.')
+    parser.add_argument('--import-records', type=int, default=100, help='Number of records sent by every bulk import request.')
+    parser.add_argument('--read-ratio', type=float, default=0.9, help='Share of reads in the mixed scenario.')
+    parser.add_argument('--mode', choices=['testclient', 'socket'], default='testclient',
+                        help='Use the Flask test client or a real HTTP server on a local socket.')
+    parser.add_argument('--suite', choices=['routes', 'serialization', 'recovery', 'all'], default='routes',
+                        help='Benchmark the routes, the serialization of a whole database, startup recovery, or all of them.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of repetitions of every serialization measurement.')
+    parser.add_argument('--compact', action='store_true', help='Keep stored values in compact encoded form.')
+    parser.add_argument('--scenarios', nargs='*', help='Only run these scenarios.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the random data generator.')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout.')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against.')
+    return parser.parse_args(argv)
+
+
+
+
+
+def makeValue(rng, index, size):
+    """
+    Generate a synthetic JSON value of roughly the requested encoded size.
+
+    Parameters:
+        rng (random.Random): The random number generator.
+        index (int): A number stored in the value.
+        size (int): The approximate size in bytes.
+
+    Returns:
+        dict: The generated value.
+    """
+    payload = ''.join(rng.choices(string.ascii_letters + string.digits, k=max(size - 40, 1)))
+    return {'id': index, 'active': index % 2 == 0, 'payload': payload}
+
+
+
+
+
+class TestClientTransport:
+    """
+    Send requests through the Flask test client.
+    """
+
+    def __init__(self, app):
+        self.client = app.app.test_client()
+
+    def send(self, method, path, body=None, headers=None):
+        if isinstance(body, bytes):
+            response = self.client.open(path, method=method, data=body, content_type='application/x-ndjson', headers=headers)
+        else:
+            response = self.client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+
+
+
+class SocketTransport:
+    """
+    Send requests over a real HTTP connection to a local server.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    def send(self, method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            headers = dict(headers or {})
+            payload = None
+            if isinstance(body, bytes):
+                payload = body
+                headers['Content-Type'] = 'application/x-ndjson'
+            elif body is not None:
+                payload = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+    def close(self):
+        pass
+
+
+
+
+
+class Benchmark:
+    """
+    Runs every scenario against an isolated copy of the application.
+    """
+
+    def __init__(self, app, options):
+        self.app = app
+        self.options = options
+        self.rng = random.Random(options.seed)
+        self.values = [makeValue(self.rng, i, options.value_size) for i in range(options.keys)]
+        self.passcode = None
+        self.token = None
+        self.server = None
+        self.scenarios = self.buildScenarios()
+
+    def transport(self):
+        """
+        Create a transport for one client thread.
+
+        Returns:
+            An object with a send(method, path, body) method returning the status code.
+        """
+        if self.server is not None:
+            return SocketTransport(self.server.host, self.server.port)
+        return TestClientTransport(self.app)
+
+    def startServer(self):
+        """
+        Start a threaded HTTP server on a free local port.
+
+        Returns:
+            None
+        """
+        from werkzeug.serving import make_server, WSGIRequestHandler
+
+        class QuietRequestHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, self.app.app, threaded=True, request_handler=QuietRequestHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stopServer(self):
+        """
+        Stop the HTTP server if one is running.
+
+        Returns:
+            None
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+    def seed(self):
+        """
+        Reset the benchmark database to the synthetic data set.
+
+        Returns:
+            None
+        """
+        if self.passcode is None:
+            status, body = self.request('POST', '/create_database?name=' + BENCH_DATABASE)
+            self.passcode = body['passcode']
+            status, body = self.request('POST', '/token/' + BENCH_DATABASE, {'passcode': self.passcode, 'ttl': 86400})
+            self.token = body['token']
+        with self.app.data_lock:
+            self.app.data[BENCH_DATABASE] = {'key_{}'.format(i): self.app.storeValue(value) for i, value in enumerate(self.values)}
+            self.app.versions[BENCH_DATABASE] = {}
+            self.app.markDirty(BENCH_DATABASE, reset=True)
+            for name in [name for name in self.app.data if name != BENCH_DATABASE]:
+                del self.app.data[name]
+                self.app.passcodes.pop(name, None)
+                self.app.versions.pop(name, None)
+                self.app.database_stats.pop(name, None)
+                self.app.markDirty(name, reset=True)
+        self.app.rebuildStats(BENCH_DATABASE)
+        self.app.saveData()
+        self.app.flushData()
+
+    def request(self, method, path, body=None):
+        """
+        Send a single request through the test client and decode its JSON body.
+
+        Returns:
+            tuple: The status code and the decoded body.
+        """
+        response = self.app.app.test_client().open(path, method=method, json=body)
+        return response.status_code, response.get_json()
+
+    def randomKey(self, rng):
+        return 'key_{}'.format(rng.randrange(self.options.keys))
+
+    def buildScenarios(self):
+        """
+        Describe every scenario as a route, an optional preparation step and a request builder.
+
+        Every builder receives the index of the request and a random number generator
+        and returns the method, path, JSON body and optionally the headers of the request.
+
+        Returns:
+            dict: The scenarios by name.
+        """
+        p = lambda: self.passcode
+        value = lambda i: self.values[i % len(self.values)]
+        return {
+            'api_documentation': {
+                'route': '/',
+                'build': lambda i, rng: ('GET', '/', None)
+            },
+            'health': {
+                'route': '/health',
+                'build': lambda i, rng: ('GET', '/health', None)
+            },
+            'metrics': {
+                'route': '/metrics',
+                'build': lambda i, rng: ('GET', '/metrics', None)
+            },
+            'create_database': {
+                'route': '/create_database',
+                'build': lambda i, rng: ('POST', '/create_database?name=bench{:08d}'.format(i), None)
+            },
+            'add_to_database': {
+                'route': '/add_to_database/<string:name>',
+                'build': lambda i, rng: ('POST', '/add_to_database/{}?key=new_{}&passcode={}'.format(BENCH_DATABASE, i, p()), value(i))
+            },
+            'view_database': {
+                'route': '/view_database/<string:name>',
+                'build': lambda i, rng: ('GET', '/view_database/{}?passcode={}'.format(BENCH_DATABASE, p()), None)
+            },
+            'search_in_database': {
+                'route': '/search_in_database/<string:name>',
+                'build': lambda i, rng: ('GET', '/search_in_database/{}?search_param={}&passcode={}'.format(BENCH_DATABASE, self.randomKey(rng), p()), None)
+            },
+            'edit_in_database': {
+                'route': '/edit_in_database/<string:database>/<string:key>',
+                'build': lambda i, rng: ('PUT', '/edit_in_database/{}/{}?passcode={}'.format(BENCH_DATABASE, self.randomKey(rng), p()), value(i))
+            },
+            'delete_from_database': {
+                'route': '/delete_from_database/<string:database>/<string:key>',
+                'prepare': self.prepareDeletableKeys,
+                'build': lambda i, rng: ('DELETE', '/delete_from_database/{}/del_{}?passcode={}'.format(BENCH_DATABASE, i, p()), None)
+            },
+            'transaction': {
+                'route': '/transaction/<string:database>',
+                'build': lambda i, rng: ('POST', '/transaction/{}?passcode={}'.format(BENCH_DATABASE, p()), {'operations': [
+                    {'key': self.randomKey(rng), 'op': 'set', 'value': value(i)},
+                    {'key': 'txn_{}'.format(i), 'op': 'set', 'value': value(i + 1), 'expected_version': 0}
+                ]})
+            },
+            'import': {
+                'route': '/import/<string:name>',
+                'build': lambda i, rng: ('POST', '/import/{}?passcode={}'.format(BENCH_DATABASE, p()), self.buildImportBody(i))
+            },
+            'search_with_token': {
+                'route': None,
+                'build': lambda i, rng: ('GET', '/search_in_database/{}?search_param={}'.format(BENCH_DATABASE, self.randomKey(rng)), None,
+                                         {'Authorization': 'Bearer ' + self.token})
+            },
+            'token': {
+                'route': '/token/<string:name>',
+                'build': lambda i, rng: ('POST', '/token/' + BENCH_DATABASE, {'passcode': p(), 'scope': 'read'})
+            },
+            'revoke_token': {
+                'route': '/revoke_token',
+                'prepare': self.prepareRevocableTokens,
+                'build': lambda i, rng: ('POST', '/revoke_token', None, {'Authorization': 'Bearer ' + self.revocable[i]})
+            },
+            'stats': {
+                'route': '/stats/<string:name>',
+                'build': lambda i, rng: ('GET', '/stats/{}?passcode={}'.format(BENCH_DATABASE, p()), None)
+            },
+            'catalog': {
+                'route': '/catalog',
+                'build': lambda i, rng: ('GET', '/catalog?sort=total_value_bytes&per_page=20', None)
+            },
+            'download_data': {
+                'route': '/download_data/<string:name>',
+                'build': lambda i, rng: ('GET', '/download_data/{}?passcode={}'.format(BENCH_DATABASE, p()), None)
+            },
+            'query_data': {
+                'route': '/query_data',
+                'build': lambda i, rng: ('GET', '/query_data?database_name={}&search_param={}&passcode={}'.format(BENCH_DATABASE, self.randomKey(rng), p()), None)
+            },
+            'backup': {
+                'route': '/backup',
+                'build': lambda i, rng: ('POST', '/backup', None)
+            },
+            'delete_database': {
+                'route': '/delete_database/<string:name>',
+                'prepare': self.prepareDeletableDatabases,
+                'build': lambda i, rng: ('DELETE', '/delete_database/drop{:08d}?passcode={}'.format(i, p()), None)
+            },
+            'mixed': {
+                'route': None,
+                'build': self.buildMixed
+            }
+        }
+
+    def buildMixed(self, i, rng):
+        """
+        Build a request of the mixed scenario: a key lookup or an edit, in the configured proportion.
+        """
+        key = self.randomKey(rng)
+        if rng.random() < self.options.read_ratio:
+            return 'GET', '/search_in_database/{}?search_param={}&passcode={}'.format(BENCH_DATABASE, key, self.passcode), None
+        return 'PUT', '/edit_in_database/{}/{}?passcode={}'.format(BENCH_DATABASE, key, self.passcode), self.values[i % len(self.values)]
+
+    def buildImportBody(self, i):
+        """
+        Build the newline-delimited JSON body of a bulk import request with fresh keys.
+        """
+        count = self.options.import_records
+        lines = [json.dumps({'key': 'import_{}_{}'.format(i, j), 'value': self.values[(i * count + j) % len(self.values)]}) for j in range(count)]
+        return '\n'.join(lines).encode('utf-8')
+
+    def prepareRevocableTokens(self):
+        now = time.time()
+        self.revocable = [
+            self.app.signToken({'db': BENCH_DATABASE, 'scope': 'read', 'iat': now, 'exp': now + 3600, 'jti': 'bench{}'.format(i)})
+            for i in range(self.options.requests)
+        ]
+
+    def prepareDeletableKeys(self):
+        with self.app.data_lock:
+            for i in range(self.options.requests):
+                self.app.data[BENCH_DATABASE]['del_{}'.format(i)] = self.app.storeValue(self.values[i % len(self.values)])
+                self.app.markDirty(BENCH_DATABASE, 'del_{}'.format(i))
+        self.app.rebuildStats(BENCH_DATABASE)
+
+    def prepareDeletableDatabases(self):
+        encrypted = self.app.encryptPasscode(self.passcode)
+        with self.app.data_lock:
+            for i in range(self.options.requests):
+                name = 'drop{:08d}'.format(i)
+                self.app.data[name] = {}
+                self.app.passcodes[name] = {'passcode': encrypted, 'created_at': time.time()}
+                self.app.markDirty(name, reset=True)
+
+    def runScenario(self, name):
+        """
+        Run one scenario with the configured number of requests and clients.
+
+        Parameters:
+            name (str): The name of the scenario.
+
+        Returns:
+            dict: Throughput, latency percentiles and status code counts of the scenario.
+        """
+        scenario = self.scenarios[name]
+        self.seed()
+        if 'prepare' in scenario:
+            scenario['prepare']()
+
+        counter = itertools.count()
+        counter_lock = threading.Lock()
+        latencies = []
+        statuses = {}
+        results_lock = threading.Lock()
+
+        def client(worker):
+            rng = random.Random(self.options.seed * 1000 + worker)
+            transport = self.transport()
+            local_latencies = []
+            local_statuses = {}
+            while True:
+                with counter_lock:
+                    index = next(counter)
+                if index >= self.options.requests:
+                    break
+                request = scenario['build'](index, rng)
+                started = time.perf_counter()
+                status = transport.send(*request)
+                local_latencies.append(time.perf_counter() - started)
+                local_statuses[status] = local_statuses.get(status, 0) + 1
+            transport.close()
+            with results_lock:
+                latencies.extend(local_latencies)
+                for status, count in local_statuses.items():
+                    statuses[status] = statuses.get(status, 0) + count
+
+        threads = [threading.Thread(target=client, args=(worker,)) for worker in range(self.options.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        # Include the time needed to get the writes onto disk
+        flush_started = time.perf_counter()
+        self.app.flushData()
+        flush_seconds = time.perf_counter() - flush_started
+
+        return {
+            'route': scenario['route'],
+            'requests': len(latencies),
+            'seconds': elapsed,
+            'throughput_rps': len(latencies) / elapsed if elapsed else None,
+            'latency_ms': summarizeLatencies(latencies),
+            'flush_seconds': flush_seconds,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'errors': sum(count for status, count in statuses.items() if status >= 500),
+            'shed': statuses.get(429, 0)
+        }
+
+    def uncoveredRoutes(self):
+        """
+        List the routes of the application that no scenario exercises.
+
+        Returns:
+            list: The uncovered route rules.
+        """
+        covered = {scenario['route'] for scenario in self.scenarios.values()}
+        rules = {rule.rule for rule in self.app.app.url_map.iter_rules()}
+        return sorted(rules - covered - SKIPPED_ROUTES)
+
+    def run(self):
+        """
+        Run every selected scenario.
+
+        Returns:
+            dict: The configuration, environment and results of the run.
+        """
+        names = self.options.scenarios or list(self.scenarios)
+        unknown = [name for name in names if name not in self.scenarios]
+        if unknown:
+            raise SystemExit('Unknown scenarios: ' + ', '.join(unknown))
+
+        results = {}
+        if self.options.suite in ('routes', 'all'):
+            if self.options.mode == 'socket':
+                self.startServer()
+            try:
+                results = {name: self.runScenario(name) for name in names}
+            finally:
+                self.stopServer()
+
+        report = {
+            'config': {
+                'keys': self.options.keys,
+                'value_size': self.options.value_size,
+                'requests': self.options.requests,
+                'concurrency': self.options.concurrency,
+                'read_ratio': self.options.read_ratio,
+                'import_records': self.options.import_records,
+                'compact': self.options.compact,
+                'mode': self.options.mode,
+                'seed': self.options.seed
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'timestamp': time.time()
+            },
+            'uncovered_routes': self.uncoveredRoutes(),
+            'memory': self.measureMemory(),
+            'results': results
+        }
+        if self.options.suite in ('serialization', 'all'):
+            report['serialization'] = self.runSerialization()
+        if self.options.suite in ('recovery', 'all'):
+            report['recovery'] = self.runRecovery()
+        return report
+
+    def measureMemory(self):
+        """
+        Measure the approximate memory used by the synthetic database.
+
+        Returns:
+            dict: The approximate size of the stored values and the size of their JSON encoding, in bytes.
+        """
+        self.seed()
+        entries = self.app.data[BENCH_DATABASE]
+        return {
+            'stored_bytes': approximateSize(entries, self.app.CompactValue),
+            'encoded_bytes': len(self.app.encodeDatabase(BENCH_DATABASE, entries))
+        }
+
+    def runSerialization(self):
+        """
+        Compare the ways of serializing the whole synthetic database for persistence.
+
+        Measures the previous pretty-printed stdlib encoding, the compact stdlib encoding,
+        the cached stdlib fallback of the application with an empty and with a full cache,
+        and the encoding the application actually uses.
+
+        Returns:
+            dict: The best time in seconds and the size in bytes of every method.
+        """
+        self.seed()
+        snapshot = self.app.takeSnapshot()
+
+        fast_library = self.app.orjson
+
+        def encodeStdlib(cold):
+            # Measure the cached fallback used when orjson is not installed
+            self.app.orjson = None
+            try:
+                if cold:
+                    self.app.encoded_values = {}
+                return self.app.encodeSnapshotData(snapshot)
+            finally:
+                self.app.orjson = fast_library
+
+        methods = {
+            'stdlib_indent': lambda: json.dumps(snapshot['data'], indent=4).encode('utf-8'),
+            'stdlib_compact': lambda: json.dumps(snapshot['data'], separators=(',', ':')).encode('utf-8'),
+            'stdlib_cached_cold': lambda: encodeStdlib(True),
+            'stdlib_cached_warm': lambda: encodeStdlib(False),
+            'fast': lambda: self.app.encodeSnapshotData(snapshot)
+        }
+        results = {'library': 'orjson' if fast_library is not None else 'json'}
+        for name, method in methods.items():
+            timings = []
+            for _ in range(max(self.options.repeat, 1)):
+                started = time.perf_counter()
+                encoded = method()
+                timings.append(time.perf_counter() - started)
+            results[name] = {'seconds': min(timings), 'bytes': len(encoded)}
+        baseline = results['stdlib_indent']['seconds']
+        for name in methods:
+            results[name]['speedup'] = baseline / results[name]['seconds'] if results[name]['seconds'] else None
+        return results
+
+    def runRecovery(self):
+        """
+        Measure how long startup recovery takes, before and after compaction.
+
+        Writes the synthetic database and --requests edits through the application,
+        then recovers the storage directory from the snapshot plus the log tail, and
+        again after compacting everything into a new snapshot segment. Loading the same
+        data from a single JSON file, as earlier versions did, is measured for comparison.
+
+        Returns:
+            dict: The best recovery time in seconds, the records replayed and the bytes on disk of every case.
+        """
+        self.seed()
+        for i in range(self.options.requests):
+            self.request('PUT', '/edit_in_database/{}/{}?passcode={}'.format(BENCH_DATABASE, self.randomKey(self.rng), self.passcode),
+                         self.values[i % len(self.values)])
+        self.app.flushData()
+        directory = self.app.app.config['STORAGE_DIR']
+
+        def storageBytes():
+            snapshots, logs = self.app.listSegments(directory)
+            return sum(os.path.getsize(path) for path in itertools.chain(snapshots.values(), logs.values()))
+
+        def measure():
+            timings = []
+            for _ in range(max(self.options.repeat, 1)):
+                started = time.perf_counter()
+                state = self.app.recoverStorage(directory)
+                timings.append(time.perf_counter() - started)
+            return {
+                'seconds': min(timings),
+                'records': state['records'],
+                'keys': len(state['data'].get(BENCH_DATABASE, {})),
+                'bytes': storageBytes()
+            }
+
+        results = {'log_tail': measure()}
+
+        # Seal the log and compact it while the writer is idle
+        started = time.perf_counter()
+        self.app.requestCompaction(self.app.copyState(self.app.persisted_state), self.app.rollLogSegment())
+        self.app.flushData()
+        results['compaction_seconds'] = time.perf_counter() - started
+        results['snapshot'] = measure()
+
+        legacy = self.app.encodeSnapshotData(self.app.takeSnapshot())
+        timings = []
+        for _ in range(max(self.options.repeat, 1)):
+            started = time.perf_counter()
+            json.loads(legacy)
+            timings.append(time.perf_counter() - started)
+        results['legacy_json'] = {'seconds': min(timings), 'bytes': len(legacy)}
+        return results
+
+
+
+
+
+def summarizeLatencies(latencies):
+    """
+    Summarize a list of latencies.
+
+    Parameters:
+        latencies (list): The latencies in seconds.
+
+    Returns:
+        dict: The mean, p50, p99 and max latency in milliseconds.
+    """
+    if not latencies:
+        return {'mean': None, 'p50': None, 'p99': None, 'max': None}
+    ordered = sorted(latencies)
+    return {
+        'mean': 1000 * sum(ordered) / len(ordered),
+        'p50': 1000 * percentile(ordered, 50),
+        'p99': 1000 * percentile(ordered, 99),
+        'max': 1000 * ordered[-1]
+    }
+
+
+
+
+
+def percentile(ordered, rank):
+    """
+    Get a percentile of a sorted list using the nearest-rank method.
+
+    Parameters:
+        ordered (list): The sorted values.
+        rank (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The value at that percentile.
+    """
+    index = max(int(-(-rank * len(ordered) // 100)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+
+
+
+def approximateSize(value, compact_type):
+    """
+    Approximate the memory used by a stored value, including nested objects.
+
+    Parameters:
+        value: The value to measure.
+        compact_type (type): The class of values kept in compact form by the application.
+
+    Returns:
+        int: The approximate size in bytes.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, compact_type):
+        size += sys.getsizeof(value.encoded)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + approximateSize(item, compact_type)
+    elif isinstance(value, list):
+        for item in value:
+            size += approximateSize(item, compact_type)
+    return size
+
+
+
+
+
+def compareResults(baseline, current):
+    """
+    Compare the throughput and p99 latency of two runs.
+
+    Parameters:
+        baseline (dict): The results of the earlier run.
+        current (dict): The results of this run.
+
+    Returns:
+        dict: The relative change of every scenario present in both runs.
+    """
+    comparison = {}
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or not before.get('throughput_rps') or not before['latency_ms'].get('p99'):
+            continue
+        comparison[name] = {
+            'throughput_change': result['throughput_rps'] / before['throughput_rps'] - 1,
+            'p99_change': result['latency_ms']['p99'] / before['latency_ms']['p99'] - 1
+        }
+    return comparison
+
+
+
+
+
+def loadApp(directory, compact=False):
+    """
+    Import the application with a fresh working directory so its data files stay isolated.
+
+    Parameters:
+        directory (str): The directory the application reads and writes its files in.
+        compact (bool): Whether to keep stored values in compact form.
+
+    Returns:
+        module: The imported application module.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(directory)
+    if compact:
+        os.environ['OPENSOURCE_DB_COMPACT_VALUES'] = '1'
+    return importlib.import_module('app')
+
+
+
+
+
+def main(argv=None):
+    """
+    Run the benchmark and write its results as JSON.
+
+    Parameters:
+        argv (list): The command line arguments, or None to use sys.argv.
+
+    Returns:
+        dict: The results of the run.
+    """
+    options = parseArguments(argv)
+    if options.output:
+        options.output = os.path.abspath(options.output)
+    if options.baseline:
+        with open(options.baseline, 'r') as openfile:
+            baseline = json.load(openfile)
+    else:
+        baseline = None
+
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='opensource-db-bench-') as directory:
+        # Silence the per-save console message of the application while measuring
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            app = loadApp(directory, options.compact)
+            results = Benchmark(app, options).run()
+        os.chdir(original_directory)
+
+    if baseline is not None:
+        results['comparison'] = compareResults(baseline, results)
+
+    output = json.dumps(results, indent=2)
+    if options.output:
+        with open(options.output, 'w') as outfile:
+            outfile.write(output + '\n')
+    else:
+        print(output)
+    return results
+
+
+
+
+
+# Run the benchmark
+if __name__ == '__main__':
+    main()